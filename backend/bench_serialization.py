@@ -0,0 +1,80 @@
+"""Compare CPU per request for read serialization paths.
+
+Measures the previous read path (build a model per document, then let
+FastAPI re-validate it through response_model and JSON-encode it) against
+the trusted fast path (projected documents straight to orjson).
+
+    python bench_serialization.py [rows] [repeats]
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from server import Booking, render_json, serialize_documents  # noqa: E402
+
+
+def make_bookings(rows: int) -> List[dict]:
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "monastery_id": str(uuid.uuid4()),
+            "visitor_name": f"Visitor {i}",
+            "visitor_email": f"visitor{i}@example.com",
+            "visitor_phone": "+91 98765 43210",
+            "visit_date": "2025-03-15",
+            "visit_time": "10:00",
+            "group_size": i % 12 + 1,
+            "tour_type": "guided_tour",
+            "special_requests": None,
+            "total_amount": float((i % 12 + 1) * 500),
+            "booking_status": "confirmed",
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+        }
+        for i in range(rows)
+    ]
+
+
+def model_path(docs: List[dict], adapter: TypeAdapter) -> bytes:
+    models = [Booking(**doc) for doc in docs]
+    validated = adapter.validate_python([m.model_dump() for m in models])
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def trusted_path(docs: List[dict]) -> bytes:
+    return render_json(serialize_documents(docs, Booking))
+
+
+def cpu_ms(fn, repeats: int) -> float:
+    fn()
+    started = time.process_time()
+    for _ in range(repeats):
+        fn()
+    return (time.process_time() - started) * 1000 / repeats
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    docs = make_bookings(rows)
+    adapter = TypeAdapter(List[Booking])
+
+    before = cpu_ms(lambda: model_path(docs, adapter), repeats)
+    after = cpu_ms(lambda: trusted_path(docs), repeats)
+    print(f"{rows} bookings, {repeats} requests each")
+    print(f"  model + response_model: {before:8.2f} ms CPU/request")
+    print(f"  trusted orjson path:    {after:8.2f} ms CPU/request")
+    print(f"  speedup:                {before / after:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
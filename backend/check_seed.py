@@ -0,0 +1,33 @@
+"""Validate the seed data files against the API models.
+
+Checks every file under seed/ without touching the database, so a broken
+seed file is caught before an initialize or sync endpoint runs it.
+
+    python check_seed.py
+"""
+import os
+import sys
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'seed_check')
+
+from server import SeedDataError, load_cultural_event_seed, load_monastery_seed  # noqa: E402
+
+
+def main() -> int:
+    failed = False
+    for name, load in [("monasteries", load_monastery_seed), ("cultural_events", load_cultural_event_seed)]:
+        try:
+            records = load()
+        except SeedDataError as e:
+            failed = True
+            print(f"{name}: FAILED")
+            for error in e.errors:
+                print(f"  {error}")
+            continue
+        print(f"{name}: {len(records)} records OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
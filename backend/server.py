@@ -1,16 +1,35 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Path as PathParam, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 from typing import List, Dict, Optional
 import uuid
-from datetime import datetime, timezone
+import base64
+import bisect
+import calendar
+import csv
+import io
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 import asyncio
+import httpx
+import numpy as np
 import openai
+import orjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -28,9 +47,987 @@ api_router = APIRouter(prefix="/api")
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
-if OPENAI_API_KEY:
-    openai.api_key = OPENAI_API_KEY
+OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', '30'))
+OPENAI_CONNECT_TIMEOUT = float(os.environ.get('OPENAI_CONNECT_TIMEOUT', '5'))
+OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', '2'))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get('OPENAI_MAX_CONNECTIONS', '20'))
+OPENAI_MAX_KEEPALIVE = int(os.environ.get('OPENAI_MAX_KEEPALIVE', '10'))
 
+# Shared async client, created once at startup so chat requests reuse pooled
+# keep-alive connections instead of opening a new client per request.
+openai_client: Optional[openai.AsyncOpenAI] = None
+
+llm_stats = {"in_flight": 0, "total_calls": 0, "failed_calls": 0}
+
+@asynccontextmanager
+async def track_llm_call():
+    """Count an upstream LLM call while it is in flight"""
+    llm_stats["in_flight"] += 1
+    llm_stats["total_calls"] += 1
+    try:
+        yield
+    except BaseException:
+        llm_stats["failed_calls"] += 1
+        raise
+    finally:
+        llm_stats["in_flight"] -= 1
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """Return the shared OpenAI client or fail if the AI service is not configured"""
+    if openai_client is None:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+    return openai_client
+
+class TTLCache:
+    """Small LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> int:
+        """Drop every entry, returning how many there were"""
+        removed = len(self._entries)
+        self._entries.clear()
+        return removed
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# AI guide answer cache, keyed on the normalized question and monastery context
+CHAT_CACHE_SIZE = int(os.environ.get('CHAT_CACHE_SIZE', '1000'))
+CHAT_CACHE_TTL = float(os.environ.get('CHAT_CACHE_TTL', '3600'))
+answer_cache = TTLCache(CHAT_CACHE_SIZE, CHAT_CACHE_TTL)
+
+QUESTION_FILLER_WORDS = {
+    "a", "an", "the", "please", "pls", "kindly", "hi", "hello", "hey", "thanks",
+    "thank", "you", "me", "tell", "can", "could", "would", "i", "want", "to", "know"
+}
+
+def normalize_question(message: str) -> str:
+    """Reduce a question to a canonical form so near-duplicates share a cache key
+
+    Uses the retrieval tokenizer, so questions differing only in stop words or
+    plurals share an answer.
+    """
+    words = tokenize(message) or re.findall(r"[a-z0-9]+", message.lower())
+    kept = [w for w in words if w not in QUESTION_FILLER_WORDS]
+    return " ".join(kept or words)
+
+def answer_cache_key(message: str, monastery_id: Optional[str]) -> str:
+    return f"{monastery_id or ''}|{normalize_question(message)}"
+
+def invalidate_cached_answers():
+    """Forget every cached answer; any of them may have retrieved the changed document"""
+    removed = answer_cache.invalidate()
+    if removed:
+        logger.info(f"Invalidated {removed} cached AI guide answers")
+
+# Retrieval index for the AI guide
+RETRIEVAL_TOP_K = int(os.environ.get('RETRIEVAL_TOP_K', '5'))
+
+INDEX_STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "me", "of", "on", "or", "so", "that", "the", "there", "this",
+    "to", "was", "what", "when", "where", "which", "who", "why", "with", "you", "your"
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stop words removed and simple plurals folded"""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in INDEX_STOP_WORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+class RetrievalIndex:
+    """BM25 index over text chunks, maintained incrementally per source document"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunks: Dict[int, dict] = {}
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.sources: Dict[str, List[int]] = defaultdict(list)
+        self.total_length = 0
+        self._next_id = 0
+        self._vocabulary: Optional[List[str]] = None
+
+    def upsert(self, source: str, chunks: List[tuple]):
+        """Replace every chunk of a source document with (title, text) pairs"""
+        self.remove(source)
+        for title, text in chunks:
+            terms = tokenize(f"{title} {text}")
+            if not terms:
+                continue
+            chunk_id = self._next_id
+            self._next_id += 1
+            counts: Dict[str, int] = defaultdict(int)
+            for term in terms:
+                counts[term] += 1
+            for term, tf in counts.items():
+                self.postings[term][chunk_id] = tf
+            self._vocabulary = None
+            self.chunks[chunk_id] = {"source": source, "title": title, "text": text, "length": len(terms)}
+            self.sources[source].append(chunk_id)
+            self.total_length += len(terms)
+
+    def remove(self, source: str):
+        for chunk_id in self.sources.pop(source, []):
+            chunk = self.chunks.pop(chunk_id)
+            self.total_length -= chunk["length"]
+            for term in set(tokenize(f"{chunk['title']} {chunk['text']}")):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self.postings[term]
+                        self._vocabulary = None
+
+    def clear(self, prefix: str = ""):
+        for source in [s for s in self.sources if s.startswith(prefix)]:
+            self.remove(source)
+
+    def chunks_for(self, source: str) -> List[dict]:
+        return [self.chunks[chunk_id] for chunk_id in self.sources.get(source, [])]
+
+    def expand_prefix(self, prefix: str, limit: int = 50) -> List[str]:
+        """Indexed terms starting with prefix, found by bisecting the sorted vocabulary"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:start + limit]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K, prefix: bool = False) -> List[dict]:
+        """Return the top-k chunks for a query ranked by BM25 score
+
+        With prefix=True the last query word also matches indexed terms it is a
+        prefix of, for search-as-you-type.
+        """
+        n = len(self.chunks)
+        query_terms = tokenize(query)
+        if prefix:
+            # Take the raw last word so a partial word like "monas" is not plural-folded
+            words = re.findall(r"[a-z0-9]+", query.lower())
+            if words and words[-1] not in INDEX_STOP_WORDS:
+                query_terms = query_terms[:-1] + self.expand_prefix(words[-1])
+        terms = [t for t in set(query_terms) if t in self.postings]
+        if not n or not terms:
+            return []
+        avgdl = self.total_length / n
+        ids_parts, score_parts = [], []
+        for term in terms:
+            postings = self.postings[term]
+            ids = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            lengths = np.fromiter((self.chunks[i]["length"] for i in postings), dtype=np.float64, count=len(postings))
+            idf = np.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            ids_parts.append(ids)
+            score_parts.append(idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * lengths / avgdl)))
+        chunk_ids, inverse = np.unique(np.concatenate(ids_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            chunk_id = int(chunk_ids[i])
+            matched = sorted(t for t in terms if chunk_id in self.postings[t])
+            results.append({**self.chunks[chunk_id], "score": float(scores[i]), "matched": matched})
+        return results
+
+    def stats(self) -> dict:
+        return {"sources": len(self.sources), "chunks": len(self.chunks), "terms": len(self.postings)}
+
+retrieval_index = RetrievalIndex()
+
+# In-memory monastery catalog snapshot
+SEARCH_LATENCY_BUDGET_MS = float(os.environ.get('SEARCH_LATENCY_BUDGET_MS', '50'))
+
+def monastery_search_text(monastery: dict) -> str:
+    """Searchable text for a monastery; name, tradition and festivals repeated to weight them above the description"""
+    festivals = " ".join(f['name'] for f in monastery.get('festivals', []))
+    return " ".join([
+        monastery['name'], monastery['name'],
+        monastery['tradition'], festivals, festivals,
+        " ".join(monastery['highlights']), " ".join(monastery['highlights']),
+        monastery['location'], monastery['district'],
+        monastery['description']
+    ])
+
+MONASTERY_SUMMARY_FIELDS = ["id", "name", "location", "district", "tradition", "coordinates", "main_image"]
+
+def project_document(doc: dict, fields: List[str]) -> dict:
+    return {field: doc[field] for field in fields if field in doc}
+
+def encode_cursor(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor: str, shape: Optional[tuple] = None) -> list:
+    """Decode a keyset cursor; with shape, require exactly one item of each given type"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if shape is not None and (len(key) != len(shape) or not all(
+            isinstance(item, kind) and not isinstance(item, bool) for item, kind in zip(key, shape))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+def facet_counts(values) -> List[dict]:
+    counts: Dict[str, int] = defaultdict(int)
+    for value in values:
+        counts[value] += 1
+    return [{"value": value, "count": counts[value]} for value in sorted(counts)]
+
+MONTH_NUMBERS = {
+    **{name.lower(): number for number, name in enumerate(calendar.month_name) if name},
+    **{abbr.lower(): number for number, abbr in enumerate(calendar.month_abbr) if abbr},
+    "sept": 9
+}
+MONTH_PATTERN = re.compile(r"\b(" + "|".join(sorted(MONTH_NUMBERS, key=len, reverse=True)) + r")\b")
+MONTH_RANGE_SEPARATOR = re.compile(r"\s*(?:to|through|until|-|\u2013)\s*")
+
+def parse_festival_months(text: str) -> List[int]:
+    """Months a free-text festival date falls in
+
+    "February/March" -> [2, 3]; "March to June" -> [3, 4, 5, 6]; "December/January" -> [1, 12].
+    """
+    text = text.lower()
+    if "year-round" in text or "year round" in text:
+        return list(range(1, 13))
+    months = set()
+    matches = list(MONTH_PATTERN.finditer(text))
+    for previous, match in zip([None] + matches, matches):
+        month = MONTH_NUMBERS[match.group(1)]
+        months.add(month)
+        if previous and MONTH_RANGE_SEPARATOR.fullmatch(text[previous.end():match.start()]):
+            # Ranges can wrap the year end, as in "November to February"
+            between = MONTH_NUMBERS[previous.group(1)]
+            while between != month:
+                between = between % 12 + 1
+                months.add(between)
+    return sorted(months)
+
+class FestivalIndex:
+    """Monastery festivals flattened once per catalog snapshot, with posting lists per filter value"""
+
+    def __init__(self, monasteries: List[dict]):
+        self.festivals: List[dict] = []
+        self.by_month: Dict[int, set] = defaultdict(set)
+        self.by_monastery: Dict[str, set] = defaultdict(set)
+        self.by_tradition: Dict[str, set] = defaultdict(set)
+        self.by_name_token: Dict[str, set] = defaultdict(set)
+        for m in monasteries:
+            for festival in m.get('festivals', []):
+                position = len(self.festivals)
+                months = parse_festival_months(festival['date'])
+                self.festivals.append({
+                    "name": festival['name'],
+                    "date": festival['date'],
+                    "months": months,
+                    "description": festival['description'],
+                    "significance": festival['significance'],
+                    "monastery": m['name'],
+                    "monastery_id": m['id'],
+                    "tradition": m['tradition'],
+                    "location": m['location']
+                })
+                for month in months:
+                    self.by_month[month].add(position)
+                self.by_monastery[m['id']].add(position)
+                self.by_tradition[m['tradition'].lower()].add(position)
+                for token in tokenize(festival['name']):
+                    self.by_name_token[token].add(position)
+        self.month_counts = [{"value": month, "count": len(self.by_month.get(month, ()))} for month in range(1, 13)]
+
+    def find(self, month: Optional[int] = None, monastery_id: Optional[str] = None,
+             tradition: Optional[str] = None, name: Optional[str] = None) -> List[dict]:
+        """Festivals matching every given filter, in catalog order"""
+        postings = []
+        if month:
+            postings.append(self.by_month.get(month, set()))
+        if monastery_id:
+            postings.append(self.by_monastery.get(monastery_id, set()))
+        if tradition:
+            # Substring match over the handful of distinct traditions, as /monasteries does
+            needle = tradition.lower()
+            postings.append(set().union(*(p for value, p in self.by_tradition.items() if needle in value)))
+        if name:
+            postings.extend(self.by_name_token.get(token, set()) for token in tokenize(name))
+        if not postings:
+            return self.festivals
+        return [self.festivals[position] for position in sorted(set.intersection(*postings))]
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    lat1, lng1, lat2, lng2 = np.radians(lat), np.radians(lng), np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def valid_coordinates(coordinates) -> bool:
+    try:
+        return -90 <= float(coordinates['lat']) <= 90 and -180 <= float(coordinates['lng']) <= 180
+    except (KeyError, TypeError, ValueError):
+        return False
+
+class GeoIndex:
+    """Monastery positions sorted by latitude
+
+    Radius and box queries binary-search the latitude band that can contain
+    matches and measure distances only within it, vectorized.
+    """
+
+    def __init__(self, monasteries: List[dict]):
+        located = sorted(
+            (float(m['coordinates']['lat']), float(m['coordinates']['lng']), m['id'])
+            for m in monasteries if valid_coordinates(m.get('coordinates'))
+        )
+        self.lats = np.array([p[0] for p in located], dtype=np.float64)
+        self.lngs = np.array([p[1] for p in located], dtype=np.float64)
+        self.ids = [p[2] for p in located]
+
+    def _band(self, south: float, north: float) -> tuple:
+        return int(np.searchsorted(self.lats, south, side="left")), int(np.searchsorted(self.lats, north, side="right"))
+
+    def _nearest(self, positions: np.ndarray, distances: np.ndarray, limit: int) -> List[tuple]:
+        if len(distances) > limit:
+            keep = np.argpartition(distances, limit)[:limit]
+            positions, distances = positions[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return [(self.ids[positions[i]], float(distances[i])) for i in order]
+
+    def nearby(self, lat: float, lng: float, radius_km: Optional[float] = None, limit: int = 10) -> List[tuple]:
+        """(monastery id, distance in km) pairs nearest first, optionally within radius_km"""
+        lo, hi = 0, len(self.ids)
+        if radius_km is not None:
+            spread = np.degrees(radius_km / EARTH_RADIUS_KM)
+            lo, hi = self._band(lat - spread, lat + spread)
+        positions = np.arange(lo, hi)
+        distances = haversine_km(lat, lng, self.lats[lo:hi], self.lngs[lo:hi])
+        if radius_km is not None:
+            inside = distances <= radius_km
+            positions, distances = positions[inside], distances[inside]
+        return self._nearest(positions, distances, limit)
+
+    def within(self, south: float, west: float, north: float, east: float, limit: int = 100) -> List[tuple]:
+        """(monastery id, km from the box centre) pairs inside the box, nearest the centre first
+
+        A box with west > east crosses the antimeridian.
+        """
+        lo, hi = self._band(south, north)
+        lngs = self.lngs[lo:hi]
+        if west <= east:
+            inside = (lngs >= west) & (lngs <= east)
+            centre_lng = (west + east) / 2
+        else:
+            inside = (lngs >= west) | (lngs <= east)
+            centre_lng = (west + east + 360) / 2
+            centre_lng = centre_lng - 360 if centre_lng > 180 else centre_lng
+        positions = np.arange(lo, hi)[inside]
+        distances = haversine_km((south + north) / 2, centre_lng, self.lats[positions], self.lngs[positions])
+        return self._nearest(positions, distances, limit)
+
+class CatalogSnapshot:
+    """Immutable view of the monastery catalog with precomputed lookups and facet lists"""
+
+    def __init__(self, monasteries: List[dict], version: int):
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc)
+        # Stable (name, id) order so keyset pagination is deterministic
+        self.monasteries = sorted(monasteries, key=lambda m: (m['name'], m['id']))
+        self.by_id = {m['id']: m for m in monasteries}
+        self.district_counts = facet_counts(m['district'] for m in monasteries)
+        self.tradition_counts = facet_counts(m['tradition'] for m in monasteries)
+        self.districts = [facet["value"] for facet in self.district_counts]
+        self.traditions = [facet["value"] for facet in self.tradition_counts]
+        self.festivals = FestivalIndex(self.monasteries)
+        # Content-derived, so every worker holding the same catalog agrees on ETags
+        self.fingerprint = hashlib.sha1(json.dumps(self.monasteries, sort_keys=True, default=str).encode()).hexdigest()
+        self.last_modified = max((m.get('updated_at') or m['created_at'] for m in monasteries if m.get('created_at')), default=None)
+        self.search_index = RetrievalIndex()
+        for m in monasteries:
+            self.search_index.upsert(m['id'], [(m['name'], monastery_search_text(m))])
+        self.geo_index = GeoIndex(monasteries)
+        self.attributes = MonasteryAttributes(self.monasteries)
+        self._travel_matrix: Optional["TravelMatrix"] = None
+
+    def travel_matrix(self) -> "TravelMatrix":
+        """Pairwise road estimates, built on first use and kept for the life of the snapshot"""
+        if self._travel_matrix is None:
+            self._travel_matrix = TravelMatrix(self.geo_index)
+        return self._travel_matrix
+
+class CatalogCache:
+    """Serves catalog reads from a snapshot that write endpoints swap out atomically"""
+
+    def __init__(self):
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> CatalogSnapshot:
+        snapshot = self.snapshot
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        return await self._load_current()
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Invalidate and reload; called by every endpoint that writes monasteries"""
+        self.version += 1
+        self.snapshot = None
+        return await self._load_current()
+
+    async def _load_current(self) -> CatalogSnapshot:
+        async with self._lock:
+            # A write during a load discards it, so load until one survives
+            while self.snapshot is None:
+                await self._load(self.version)
+            return self.snapshot
+
+    async def _load(self, version: int):
+        monasteries = await db.sikkim_monasteries.find({}, model_projection(SikkimMonastery)).to_list(length=None)
+        self.reloads += 1
+        # A write that landed while we were reading supersedes this load
+        if version == self.version:
+            self.snapshot = CatalogSnapshot(monasteries, version)
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            "version": self.version,
+            "loaded": snapshot is not None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "monasteries": len(snapshot.monasteries) if snapshot else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads
+        }
+
+catalog_cache = CatalogCache()
+
+# Similar monasteries
+# Each monastery's top-k most similar sites, precomputed so a recommendation
+# is a table read. Similarity is a weighted sum of per-feature scores in [0, 1].
+SIMILAR_TOP_K = int(os.environ.get('SIMILAR_TOP_K', '10'))
+SIMILARITY_WEIGHTS = {
+    "tradition": 0.25,
+    "district": 0.15,
+    "distance": 0.25,
+    "altitude": 0.1,
+    "highlights": 0.15,
+    "festivals": 0.1
+}
+SIMILARITY_DISTANCE_SCALE_KM = 30.0
+SIMILARITY_ALTITUDE_SCALE_M = 500.0
+
+def parse_altitude_m(text: str) -> Optional[float]:
+    """Metres from free text such as "1,550 meters" or "6,840 ft"; None when there is no figure"""
+    match = re.search(r"(\d[\d,]*(?:\.\d+)?)\s*(m|meters?|metres?|ft|feet)\b", text.lower())
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    return value * 0.3048 if match.group(2) in ("ft", "feet") else value
+
+def similarity_profile(monastery: dict) -> dict:
+    coordinates = monastery.get('coordinates')
+    located = valid_coordinates(coordinates)
+    altitude = parse_altitude_m(monastery.get('altitude', ''))
+    festivals = set()
+    for festival in monastery.get('festivals', []):
+        festivals.update(tokenize(festival['name']))
+        festivals.update(f"month:{month}" for month in parse_festival_months(festival['date']))
+    return {
+        "id": monastery['id'],
+        "tradition": monastery['tradition'],
+        "district": monastery['district'],
+        "lat": float(coordinates['lat']) if located else np.nan,
+        "lng": float(coordinates['lng']) if located else np.nan,
+        "altitude": altitude if altitude is not None else np.nan,
+        "highlights": set(tokenize(" ".join(monastery.get('highlights', [])))),
+        "festivals": festivals
+    }
+
+def jaccard_matrix(rows: List[set], cols: List[set]) -> np.ndarray:
+    vocabulary = {term: i for i, term in enumerate(set().union(*rows, *cols))}
+    
+    def encode(sets: List[set]) -> np.ndarray:
+        matrix = np.zeros((len(sets), len(vocabulary)))
+        for r, terms in enumerate(sets):
+            matrix[r, [vocabulary[t] for t in terms]] = 1
+        return matrix
+    
+    a, b = encode(rows), encode(cols)
+    shared = a @ b.T
+    union = a.sum(axis=1)[:, None] + b.sum(axis=1)[None, :] - shared
+    return np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+
+def similarity_matrix(rows: List[dict], cols: List[dict]) -> tuple:
+    """(similarity, distance_km) for every row profile against every column profile"""
+    def column(profiles: List[dict], key: str, dtype=np.float64) -> np.ndarray:
+        return np.array([p[key] for p in profiles], dtype=dtype)
+    
+    same_tradition = column(rows, "tradition", object)[:, None] == column(cols, "tradition", object)[None, :]
+    same_district = column(rows, "district", object)[:, None] == column(cols, "district", object)[None, :]
+    distance = haversine_km(column(rows, "lat")[:, None], column(rows, "lng")[:, None],
+                            column(cols, "lat")[None, :], column(cols, "lng")[None, :])
+    altitude_gap = np.abs(column(rows, "altitude")[:, None] - column(cols, "altitude")[None, :])
+    # Unknown positions or altitudes contribute nothing rather than poisoning the score
+    similarity = (
+        SIMILARITY_WEIGHTS["tradition"] * same_tradition
+        + SIMILARITY_WEIGHTS["district"] * same_district
+        + SIMILARITY_WEIGHTS["distance"] * np.nan_to_num(np.exp(-distance / SIMILARITY_DISTANCE_SCALE_KM))
+        + SIMILARITY_WEIGHTS["altitude"] * np.nan_to_num(np.exp(-altitude_gap / SIMILARITY_ALTITUDE_SCALE_M))
+        + SIMILARITY_WEIGHTS["highlights"] * jaccard_matrix([p["highlights"] for p in rows], [p["highlights"] for p in cols])
+        + SIMILARITY_WEIGHTS["festivals"] * jaccard_matrix([p["festivals"] for p in rows], [p["festivals"] for p in cols])
+    )
+    return similarity, distance
+
+class SimilarityTable:
+    """Top-k neighbour table, kept in step with the catalog snapshot
+
+    New monasteries are added incrementally: only their rows are computed and
+    merged into existing neighbour lists. Edits or removals rebuild the table.
+    """
+
+    def __init__(self, k: int = SIMILAR_TOP_K):
+        self.k = k
+        self.fingerprint: Optional[str] = None
+        self.profiles: Dict[str, dict] = {}
+        self.neighbours: Dict[str, List[dict]] = {}
+        self.rebuilds = 0
+        self.incremental_adds = 0
+
+    def get(self, monastery_id: str) -> List[dict]:
+        return self.neighbours.get(monastery_id, [])
+
+    def sync(self, catalog: "CatalogSnapshot"):
+        if catalog.fingerprint == self.fingerprint:
+            return
+        profiles = {m['id']: similarity_profile(m) for m in catalog.monasteries}
+        # Missing values are the np.nan singleton, so unchanged profiles compare equal
+        new_ids = [i for i in profiles if i not in self.profiles]
+        unchanged = all(i in profiles and profiles[i] == self.profiles[i] for i in self.profiles)
+        if self.profiles and unchanged:
+            self._add([profiles[i] for i in new_ids])
+        else:
+            self._rebuild(list(profiles.values()))
+        self.fingerprint = catalog.fingerprint
+
+    def _top(self, ids: List[str], scores: np.ndarray, distances: np.ndarray) -> List[dict]:
+        count = min(self.k, len(ids))
+        if count == 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count] if len(scores) > count else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {"id": ids[j], "score": round(float(scores[j]), 4),
+             "distance_km": None if np.isnan(distances[j]) else round(float(distances[j]), 1)}
+            for j in top if np.isfinite(scores[j])
+        ]
+
+    def _rebuild(self, profiles: List[dict]):
+        ids = [p["id"] for p in profiles]
+        scores, distances = similarity_matrix(profiles, profiles)
+        np.fill_diagonal(scores, -np.inf)
+        self.profiles = {p["id"]: p for p in profiles}
+        self.neighbours = {ids[i]: self._top(ids, scores[i], distances[i]) for i in range(len(ids))}
+        self.rebuilds += 1
+
+    def _add(self, new: List[dict]):
+        if not new:
+            return
+        existing = list(self.profiles.values())
+        everyone = existing + new
+        ids = [p["id"] for p in everyone]
+        scores, distances = similarity_matrix(new, everyone)
+        for r in range(len(new)):
+            scores[r, len(existing) + r] = -np.inf
+        for r, profile in enumerate(new):
+            self.neighbours[profile["id"]] = self._top(ids, scores[r], distances[r])
+        # Similarity is symmetric, so column j of the new rows scores the new
+        # sites for existing monastery j; merge them into its neighbour list
+        new_ids = [p["id"] for p in new]
+        for j, profile in enumerate(existing):
+            candidates = self.neighbours.get(profile["id"], []) + [
+                {"id": new_ids[r], "score": round(float(scores[r, j]), 4),
+                 "distance_km": None if np.isnan(distances[r, j]) else round(float(distances[r, j]), 1)}
+                for r in range(len(new))
+            ]
+            candidates.sort(key=lambda n: -n["score"])
+            self.neighbours[profile["id"]] = candidates[:self.k]
+        self.profiles.update((p["id"], p) for p in new)
+        self.incremental_adds += len(new)
+
+    def stats(self) -> dict:
+        return {"monasteries": len(self.profiles), "k": self.k, "rebuilds": self.rebuilds, "incremental_adds": self.incremental_adds}
+
+similarity_table = SimilarityTable()
+
+# Typed monastery attributes
+# Parsed from the free-text fields once per write and stored alongside them,
+# so filters compare numbers instead of re-parsing strings on every read.
+SIKKIM_TZ = timezone(timedelta(hours=5, minutes=30))
+
+def parse_entrance_fees(text: str) -> tuple:
+    """(lowest, highest) fee in rupees; (0, 0) for free entry, (None, None) when unknown"""
+    amounts = [float(a.replace(",", "")) for a in re.findall(r"(?:₹|rs\.?|inr)\s*(\d[\d,]*(?:\.\d+)?)", text.lower())]
+    if amounts:
+        return min(amounts), max(amounts)
+    if re.search(r"\b(free|no fee|none)\b", text.lower()):
+        return 0.0, 0.0
+    return None, None
+
+def parse_nearest_airport(text: str) -> tuple:
+    """(airport name, distance in km) from text like "Bagdogra Airport (124 km)" """
+    distance = re.search(r"(\d[\d,]*(?:\.\d+)?)\s*km\b", text.lower())
+    name = re.split(r"[(,]", text, maxsplit=1)[0].strip() or None
+    return name, float(distance.group(1).replace(",", "")) if distance else None
+
+def monastery_facts(monastery: dict) -> dict:
+    """Typed attributes derived from a monastery's free-text fields"""
+    opens, closes = parse_visiting_hours(monastery.get('visiting_hours', ''))
+    fee_min, fee_max = parse_entrance_fees(monastery.get('entrance_fee', ''))
+    airport, airport_km = parse_nearest_airport((monastery.get('travel_info') or {}).get('nearest_airport', ''))
+    return {
+        "altitude_m": parse_altitude_m(monastery.get('altitude', '')),
+        "opens_minute": opens,
+        "closes_minute": closes,
+        "entrance_fee_min": fee_min,
+        "entrance_fee_max": fee_max,
+        "nearest_airport_name": airport,
+        "airport_distance_km": airport_km
+    }
+
+class MonasteryAttributes:
+    """Typed monastery attributes as NumPy columns aligned with the snapshot's monastery order"""
+
+    def __init__(self, monasteries: List[dict]):
+        def column(field: str) -> np.ndarray:
+            return np.array([np.nan if m.get(field) is None else m[field] for m in monasteries], dtype=np.float64)
+        
+        self.altitude = column("altitude_m")
+        self.opens = column("opens_minute")
+        self.closes = column("closes_minute")
+        self.fee_min = column("entrance_fee_min")
+        self.fee_max = column("entrance_fee_max")
+        self.airport_km = column("airport_distance_km")
+        self.airports = [(m.get("nearest_airport_name") or "").lower() for m in monasteries]
+
+    def mask(self, open_at: Optional[int] = None, free_entry: Optional[bool] = None, max_fee: Optional[float] = None,
+             min_altitude: Optional[float] = None, max_altitude: Optional[float] = None,
+             max_airport_km: Optional[float] = None, airport: Optional[str] = None) -> Optional[np.ndarray]:
+        """Rows passing every given filter, or None when no filter is given; unknown values never pass"""
+        conditions = []
+        if open_at is not None:
+            conditions.append((self.opens <= open_at) & (open_at < self.closes))
+        if free_entry is not None:
+            conditions.append(self.fee_max == 0 if free_entry else self.fee_min > 0)
+        if max_fee is not None:
+            conditions.append(self.fee_min <= max_fee)
+        if min_altitude is not None:
+            conditions.append(self.altitude >= min_altitude)
+        if max_altitude is not None:
+            conditions.append(self.altitude <= max_altitude)
+        if max_airport_km is not None:
+            conditions.append(self.airport_km <= max_airport_km)
+        if airport:
+            conditions.append(np.array([airport.lower() in name for name in self.airports], dtype=bool))
+        if not conditions:
+            return None
+        return np.logical_and.reduce(conditions)
+
+# Fast-path serialization
+# Collections are only written through our own models, so reads can skip
+# rebuilding every document as a model and go straight to orjson. Set
+# TRUSTED_READS=false to re-validate documents through their models.
+TRUSTED_READS = os.environ.get('TRUSTED_READS', 'true').lower() == 'true'
+
+def orjson_default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def render_json(payload) -> bytes:
+    return orjson.dumps(payload, default=orjson_default)
+
+def json_response(payload, status_code: int = 200) -> Response:
+    return Response(render_json(payload), status_code=status_code, media_type="application/json")
+
+def model_projection(model) -> dict:
+    """Mongo projection returning exactly the model's fields"""
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+def serialize_documents(docs: List[dict], model) -> List[dict]:
+    if TRUSTED_READS:
+        return docs
+    return [model(**doc).model_dump() for doc in docs]
+
+# Idempotency keys
+# Clients on flaky networks resend POSTs with the same Idempotency-Key. The
+# first request claims the key in Mongo (shared by all workers); duplicates
+# wait for it and replay its stored response instead of executing again.
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', '86400'))
+IDEMPOTENCY_LOCK_TIMEOUT = float(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', '120'))
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.environ.get('IDEMPOTENCY_WAIT_TIMEOUT', '60'))
+
+def request_fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(orjson.dumps(payload.model_dump(), option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+def replayed_response(record: dict) -> Response:
+    response = json_response(record["response"], status_code=record["status_code"])
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+async def run_idempotent(scope: str, key: str, payload: BaseModel, handler) -> Response:
+    """Execute handler at most once per (scope, key) and replay its result for duplicates"""
+    record_id = f"{scope}:{key}"
+    fingerprint = request_fingerprint(payload)
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_TIMEOUT
+    delay = 0.05
+    while True:
+        now = datetime.now(timezone.utc)
+        try:
+            await db.idempotency_keys.insert_one({
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "status": "in_flight",
+                "created_at": now,
+                "locked_until": now + timedelta(seconds=IDEMPOTENCY_LOCK_TIMEOUT)
+            })
+            break
+        except DuplicateKeyError:
+            record = await db.idempotency_keys.find_one({"_id": record_id})
+        if record is None:
+            continue  # Expired or abandoned between our insert and read
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        if record["status"] == "completed":
+            return replayed_response(record)
+        locked_until = record["locked_until"]
+        if locked_until.tzinfo is None:
+            locked_until = locked_until.replace(tzinfo=timezone.utc)
+        if locked_until < now:
+            # The worker that claimed it died mid-request; take the key over
+            await db.idempotency_keys.delete_one({"_id": record_id, "status": "in_flight", "locked_until": record["locked_until"]})
+            continue
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 1.0)
+    
+    try:
+        result = await handler()
+    except BaseException:
+        # Failed attempts are not recorded so the client can retry them
+        await db.idempotency_keys.delete_one({"_id": record_id})
+        raise
+    stored = orjson.loads(render_json(result))
+    await db.idempotency_keys.update_one(
+        {"_id": record_id},
+        {"$set": {"status": "completed", "status_code": 200, "response": stored}}
+    )
+    return json_response(stored)
+
+# Data versions
+# A counter per collection, bumped on every write, that feeds can turn into
+# ETags without reading the data itself. Each worker also polls the counters
+# to reload in-process state (catalog snapshot, retrieval index, cached
+# answers) after writes handled by another worker.
+DATA_VERSION_POLL_INTERVAL = float(os.environ.get('DATA_VERSION_POLL_INTERVAL', '5'))
+# Versions whose writes this worker's in-process state already reflects
+seen_data_versions: Dict[str, int] = {}
+data_version_watcher: Optional[asyncio.Task] = None
+
+async def bump_data_version(name: str) -> int:
+    version = await db.data_versions.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    # The writing worker updates its own state; the watcher need not repeat it
+    seen_data_versions[name] = version["version"]
+    return version["version"]
+
+async def get_data_version(name: str) -> dict:
+    version = await db.data_versions.find_one({"_id": name})
+    return version or {"_id": name, "version": 0, "updated_at": datetime(2024, 1, 1, tzinfo=timezone.utc)}
+
+async def publish_catalog_write() -> Optional["CatalogSnapshot"]:
+    """Signal a monastery write to every worker and reload this worker's catalog now"""
+    await bump_data_version("sikkim_monasteries")
+    return await catalog_cache.refresh()
+
+async def record_data_versions():
+    for name in ("sikkim_monasteries", "cultural_events"):
+        seen_data_versions[name] = (await get_data_version(name))["version"]
+
+async def watch_data_versions():
+    """Reload in-process state when another worker has written monasteries or events"""
+    indexed_year = datetime.now(timezone.utc).year
+    while True:
+        await asyncio.sleep(DATA_VERSION_POLL_INTERVAL)
+        try:
+            if datetime.now(timezone.utc).year != indexed_year:
+                # Recurring events are indexed with this and next year's dates
+                indexed_year = datetime.now(timezone.utc).year
+                await rebuild_retrieval_index("cultural_events")
+            for name in ("sikkim_monasteries", "cultural_events"):
+                version = (await get_data_version(name))["version"]
+                if version == seen_data_versions.get(name):
+                    continue
+                seen_data_versions[name] = version
+                if name == "sikkim_monasteries":
+                    await catalog_cache.refresh()
+                await rebuild_retrieval_index(name)
+                logger.info(f"Reloaded {name} after a write elsewhere (data version {version})")
+        except Exception as e:
+            logger.error(f"Failed to check data versions: {e}")
+
+# HTTP caching
+CACHE_POLICIES = {
+    "catalog": "public, max-age=60, stale-while-revalidate=300",
+    "calendar": "public, max-age=300, stale-while-revalidate=600",
+    "static": "public, max-age=86400",
+    # Answers that depend on the current time; caches must revalidate every use
+    "live": "no-cache"
+}
+
+def make_etag(*parts) -> str:
+    return 'W/"' + hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest() + '"'
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def caching_headers(etag: str, policy: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_POLICIES[policy]}
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate If-None-Match (weak comparison), falling back to If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        return modified.replace(microsecond=0) <= since
+    return False
+
+def not_modified_response(etag: str, policy: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=caching_headers(etag, policy, last_modified))
+
+def conditional_response(request: Request, payload, policy: str, etag: Optional[str] = None,
+                         last_modified: Optional[datetime] = None) -> Response:
+    """Render payload as JSON with caching headers, or a 304 when the client's copy is current
+
+    Without an explicit etag one is derived from the rendered body.
+    """
+    body = render_json(payload)
+    if etag is None:
+        etag = make_etag(hashlib.sha1(body).hexdigest())
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, policy, last_modified)
+    return Response(body, media_type="application/json", headers=caching_headers(etag, policy, last_modified))
+
+def catalog_etag(catalog: "CatalogSnapshot", request: Request) -> str:
+    return make_etag(catalog.fingerprint, request.url.path, request.url.query)
+
+
+
+# Visit slots are identified by date and time, so both are normalized before
+# anything is reserved: "10:00", "10:00 AM" and "10am" are one slot
+def parse_visit_time(value: str) -> Optional[tuple]:
+    """(hour, minute) from "14:30", "2:30 PM" or "2pm"; None when unparsable"""
+    for fmt in ("%H:%M", "%I:%M %p", "%I %p", "%I:%M%p", "%I%p"):
+        try:
+            parsed = datetime.strptime(value.strip().upper(), fmt)
+            return parsed.hour, parsed.minute
+        except ValueError:
+            continue
+    return None
+
+def normalize_visit_date(value: str) -> str:
+    try:
+        return date.fromisoformat(value.strip()).isoformat()
+    except ValueError:
+        raise ValueError("visit_date must be a date in YYYY-MM-DD format")
+
+def normalize_event_date(value: str) -> str:
+    try:
+        return date.fromisoformat(value.strip()).isoformat()
+    except ValueError:
+        raise ValueError("Event dates must be in YYYY-MM-DD format")
+
+def normalize_visit_time(value: str) -> str:
+    parsed = parse_visit_time(value)
+    if parsed is None:
+        raise ValueError("visit_time must be a time such as 14:30 or 2:30 PM")
+    return f"{parsed[0]:02d}:{parsed[1]:02d}"
 
 # Define Models
 class StatusCheck(BaseModel):
@@ -77,7 +1074,16 @@ class SikkimMonastery(BaseModel):
     cultural_importance: str
     festivals: List[Festival]
     travel_info: TravelInfo
+    # Typed copies of the free-text fields above, filled in by monastery_facts
+    altitude_m: Optional[float] = None
+    opens_minute: Optional[int] = None  # Minutes after midnight
+    closes_minute: Optional[int] = None
+    entrance_fee_min: Optional[float] = None  # Rupees
+    entrance_fee_max: Optional[float] = None
+    nearest_airport_name: Optional[str] = None
+    airport_distance_km: Optional[float] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None  # Set when a sync or backfill rewrites the document
 
 class MonasteryCreate(BaseModel):
     name: str
@@ -113,6 +1119,7 @@ class ChatRequest(BaseModel):
     message: str
     session_id: str
     monastery_id: Optional[str] = None
+    bypass_cache: bool = False  # Skip the answer cache and ask the model directly
 
 class Booking(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -136,10 +1143,23 @@ class BookingCreate(BaseModel):
     visitor_phone: str
     visit_date: str
     visit_time: str
-    group_size: int
+    group_size: int = Field(..., ge=1)
     tour_type: str
     special_requests: Optional[str] = None
 
+    _visit_date = field_validator("visit_date")(normalize_visit_date)
+    _visit_time = field_validator("visit_time")(normalize_visit_time)
+
+class SlotCapacity(BaseModel):
+    monastery_id: str
+    visit_date: str
+    visit_time: str
+    tour_type: str
+    capacity: int = Field(..., ge=0)
+
+    _visit_date = field_validator("visit_date")(normalize_visit_date)
+    _visit_time = field_validator("visit_time")(normalize_visit_time)
+
 class CulturalEvent(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
@@ -156,7 +1176,9 @@ class CulturalEvent(BaseModel):
     visitor_info: str      # Information for visitors
     image_url: Optional[str] = None
     is_recurring: bool = False  # Whether this event repeats annually
+    lunar_festival: Optional[str] = None  # Key into LUNAR_FESTIVAL_DATES when the date follows the Tibetan calendar
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None  # Set when a sync rewrites the document
 
 class CulturalEventCreate(BaseModel):
     title: str
@@ -172,434 +1194,115 @@ class CulturalEventCreate(BaseModel):
     visitor_info: str
     image_url: Optional[str] = None
     is_recurring: bool = False
+    lunar_festival: Optional[str] = None
 
-# Sikkim Monastery Data
-sikkim_monasteries_data = [
-    {
-        "name": "Rumtek Monastery",
-        "location": "Rumtek, East Sikkim",
-        "district": "East Sikkim",
-        "altitude": "1,550 meters",
-        "tradition": "Kagyu School of Tibetan Buddhism",
-        "description": "Also known as the Dharma Chakra Centre, Rumtek is one of the largest monasteries in Sikkim and serves as the seat-in-exile of the Karmapa Lama.",
-        "founded": "1966 (originally 1734)",
-        "architecture": "Traditional Tibetan architecture with intricate woodwork and colorful murals",
-        "spiritual_significance": "Seat of the 16th Karmapa and center of Kagyu lineage in exile",
-        "main_image": "https://images.pexels.com/photos/32010298/pexels-photo-32010298.jpeg",
-        "gallery_images": [
-            "https://images.pexels.com/photos/32010298/pexels-photo-32010298.jpeg",
-            "https://images.pexels.com/photos/2408167/pexels-photo-2408167.jpeg",
-            "https://images.pexels.com/photos/19715251/pexels-photo-19715251.jpeg"
-        ],
-        "panoramic_images": [
-            "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1574169208507-84376144848b?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1518709268805-4e9042af2176?w=2400&h=1200&fit=crop"
-        ],
-        "coordinates": {"lat": 27.2996, "lng": 88.5565},
-        "highlights": ["Golden Stupa", "Shrine Hall", "Monastery Museum", "Sacred Dance Festival"],
-        "visiting_hours": "6:00 AM - 6:00 PM",
-        "entrance_fee": "₹0",
-        "accessibility": "Road accessible, moderate walk from parking",
-        "cultural_importance": "Most important Kagyu monastery in Sikkim, seat of Karmapa lineage",
-        "festivals": [
-            {
-                "name": "Kagyu Monlam",
-                "date": "February/March",
-                "description": "Annual prayer festival with masked dances",
-                "significance": "Important spiritual gathering for Kagyu practitioners"
-            },
-            {
-                "name": "Buddha Purnima",
-                "date": "May",
-                "description": "Celebration of Buddha's birth, enlightenment, and death",
-                "significance": "Most sacred day in Buddhist calendar"
-            }
-        ],
-        "travel_info": {
-            "best_time_to_visit": "March to June, September to December",
-            "nearest_airport": "Bagdogra Airport (124 km)",
-            "accommodation": ["Hotel Sonam Delek", "Rumtek Monastery Guest House", "Gangtok Hotels"],
-            "local_transport": "Shared jeeps, private taxis from Gangtok (24 km)",
-            "permits_required": "Inner Line Permit for non-Indians",
-            "weather_info": "Pleasant climate, avoid monsoon season (July-August)"
-        }
-    },
-    {
-        "name": "Pemayangtse Monastery",
-        "location": "Pelling, West Sikkim",
-        "district": "West Sikkim",
-        "altitude": "2,085 meters",
-        "tradition": "Nyingma School of Tibetan Buddhism",
-        "description": "One of the oldest and most important monasteries in Sikkim, meaning 'Perfect Sublime Lotus'. It offers stunning views of Kanchenjunga.",
-        "founded": "1705",
-        "architecture": "Three-story structure with traditional Sikkimese architecture",
-        "spiritual_significance": "Second most important monastery in Sikkim, head monastery of Nyingma sect",
-        "main_image": "https://images.unsplash.com/photo-1634308670152-17f7f1aa4e79",
-        "gallery_images": [
-            "https://images.unsplash.com/photo-1634308670152-17f7f1aa4e79",
-            "https://images.unsplash.com/photo-1687074106203-f3dad46d9eb6",
-            "https://images.pexels.com/photos/33262249/pexels-photo-33262249.jpeg"
-        ],
-        "panoramic_images": [
-            "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1591123720950-2ec8c92e3a02?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1605108176507-b4b5c4b91b51?w=2400&h=1200&fit=crop"
-        ],
-        "coordinates": {"lat": 27.3182, "lng": 88.2160},
-        "highlights": ["Zangdog Palri Model", "Ancient Manuscripts", "Kanchenjunga Views", "Ta-tshog Festival"],
-        "visiting_hours": "7:00 AM - 5:00 PM",
-        "entrance_fee": "₹20 for Indians, ₹200 for foreigners",
-        "accessibility": "Well-connected by road, short walk from parking",
-        "cultural_importance": "Premier Nyingma monastery, showcases traditional Sikkimese Buddhism",
-        "festivals": [
-            {
-                "name": "Chaam Dance Festival",
-                "date": "January/February",
-                "description": "Sacred masked dance performances",
-                "significance": "Drives away evil spirits and brings good fortune"
-            },
-            {
-                "name": "Saga Dawa",
-                "date": "May/June",
-                "description": "Celebrates Buddha's birth, enlightenment, and parinirvana",
-                "significance": "Most sacred month in Buddhist calendar"
-            }
-        ],
-        "travel_info": {
-            "best_time_to_visit": "October to May for clear mountain views",
-            "nearest_airport": "Bagdogra Airport (160 km)",
-            "accommodation": ["Hotel Garuda", "Pelling Tourist Lodge", "Norbu Ghang Resort"],
-            "local_transport": "Shared jeeps from Pelling (2 km), taxis available",
-            "permits_required": "Inner Line Permit for areas beyond Pelling",
-            "weather_info": "Cool climate, heavy snowfall in winter, clear views in autumn"
-        }
-    },
-    {
-        "name": "Enchey Monastery",
-        "location": "Gangtok, East Sikkim",
-        "district": "East Sikkim",
-        "altitude": "1,800 meters",
-        "tradition": "Nyingma School of Tibetan Buddhism",
-        "description": "Located on a hilltop overlooking Gangtok, this monastery is believed to be blessed by guardian spirits and offers panoramic views of the city.",
-        "founded": "1909",
-        "architecture": "Traditional Tibetan style with Chinese architectural influences",
-        "spiritual_significance": "Important pilgrimage site, believed to be protected by tantric masters",
-        "main_image": "https://images.unsplash.com/photo-1543341724-c6f823532cac",
-        "gallery_images": [
-            "https://images.unsplash.com/photo-1543341724-c6f823532cac",
-            "https://images.unsplash.com/photo-1755011310512-38cfb597241c",
-            "https://images.pexels.com/photos/2409032/pexels-photo-2409032.jpeg"
-        ],
-        "panoramic_images": [
-            "https://images.unsplash.com/photo-1591123720950-2ec8c92e3a02?w=1920",
-            "https://images.unsplash.com/photo-1605108176507-b4b5c4b91b51?w=1920",
-            "https://images.unsplash.com/photo-1634308654308-2d12cb6d0f47?w=1920"
-        ],
-        "coordinates": {"lat": 27.3389, "lng": 88.6065},
-        "highlights": ["Prayer Hall", "Ancient Statues", "City Views", "Guardian Deities"],
-        "visiting_hours": "6:00 AM - 6:00 PM",
-        "entrance_fee": "₹0",
-        "accessibility": "Easy road access from Gangtok city center",
-        "cultural_importance": "Important urban monastery, center of Buddhist activities in Gangtok",
-        "festivals": [
-            {
-                "name": "Chaam Festival",
-                "date": "December/January",
-                "description": "Annual masked dance festival with elaborate costumes",
-                "significance": "Celebrates victory of good over evil"
-            },
-            {
-                "name": "Losar",
-                "date": "February/March",
-                "description": "Tibetan New Year celebrations",
-                "significance": "Beginning of new year in Tibetan calendar"
-            }
-        ],
-        "travel_info": {
-            "best_time_to_visit": "March to June, September to December",
-            "nearest_airport": "Bagdogra Airport (124 km)",
-            "accommodation": ["Hotels in Gangtok city", "Mayfair Spa Resort", "Hotel Sonam Delek"],
-            "local_transport": "Local taxis, walking distance from MG Road",
-            "permits_required": "None for the monastery itself",
-            "weather_info": "Pleasant climate year-round, avoid monsoon season"
-        }
-    },
-    {
-        "name": "Tashiding Monastery",
-        "location": "Tashiding, West Sikkim",
-        "district": "West Sikkim",
-        "altitude": "1,465 meters",
-        "tradition": "Nyingma School of Tibetan Buddhism",
-        "description": "Perched on a hilltop between Rathong and Rangeet rivers, this monastery is considered one of the most sacred in Sikkim.",
-        "founded": "1717",
-        "architecture": "Traditional architecture harmoniously blended with the natural landscape",
-        "spiritual_significance": "Most sacred monastery in Sikkim, blessed by Guru Padmasambhava",
-        "main_image": "https://images.unsplash.com/photo-1633538028057-838fd4e027a4",
-        "gallery_images": [
-            "https://images.unsplash.com/photo-1633538028057-838fd4e027a4",
-            "https://images.pexels.com/photos/6576294/pexels-photo-6576294.jpeg",
-            "https://images.pexels.com/photos/2408167/pexels-photo-2408167.jpeg"
-        ],
-        "panoramic_images": [
-            "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1591123720950-2ec8c92e3a02?w=2400&h=1200&fit=crop"
-        ],
-        "coordinates": {"lat": 27.3433, "lng": 88.2167},
-        "highlights": ["Sacred Chortens", "Holy Spring", "Bhumchu Festival", "River Confluence Views"],
-        "visiting_hours": "6:00 AM - 6:00 PM",
-        "entrance_fee": "₹0",
-        "accessibility": "Moderate trek from road, scenic walking path",
-        "cultural_importance": "Holiest site in Sikkim, significant for all Buddhist sects",
-        "festivals": [
-            {
-                "name": "Bhumchu Festival",
-                "date": "February/March",
-                "description": "Sacred water ceremony predicting the year ahead",
-                "significance": "Most important festival, determines fortune for the year"
-            },
-            {
-                "name": "Kagyat Dance",
-                "date": "December",
-                "description": "Traditional masked dance performances",
-                "significance": "Celebrates Buddha's teachings and drives away negativity"
-            }
-        ],
-        "travel_info": {
-            "best_time_to_visit": "October to May, especially during Bhumchu Festival",
-            "nearest_airport": "Bagdogra Airport (140 km)",
-            "accommodation": ["Basic guest houses in Tashiding", "Hotels in nearby Geyzing"],
-            "local_transport": "Shared jeeps from Geyzing, private taxis available",
-            "permits_required": "Inner Line Permit for non-Indians",
-            "weather_info": "Pleasant climate, can be misty, best visibility in winter"
-        }
-    },
-    {
-        "name": "Do-drul Chorten",
-        "location": "Gangtok, East Sikkim",
-        "district": "East Sikkim",
-        "altitude": "1,650 meters",
-        "tradition": "Nyingma School of Tibetan Buddhism",
-        "description": "The most important stupa in Sikkim, surrounded by 108 prayer wheels and containing sacred relics and mantras.",
-        "founded": "1945",
-        "architecture": "Traditional Tibetan stupa architecture with golden spire",
-        "spiritual_significance": "Important pilgrimage site, believed to subdue evil forces",
-        "main_image": "https://images.pexels.com/photos/33262249/pexels-photo-33262249.jpeg",
-        "gallery_images": [
-            "https://images.pexels.com/photos/33262249/pexels-photo-33262249.jpeg",
-            "https://images.pexels.com/photos/19715251/pexels-photo-19715251.jpeg",
-            "https://images.unsplash.com/photo-1566499175117-c78fabf20b7d"
-        ],
-        "panoramic_images": [
-            "https://images.unsplash.com/photo-1605108176507-b4b5c4b91b51?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1634308654308-2d12cb6d0f47?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1563519007-3954c4fa2f7e?w=2400&h=1200&fit=crop"
-        ],
-        "coordinates": {"lat": 27.3178, "lng": 88.6094},
-        "highlights": ["108 Prayer Wheels", "Golden Stupa", "Sacred Relics", "Prayer Flags"],
-        "visiting_hours": "5:00 AM - 7:00 PM",
-        "entrance_fee": "₹0",
-        "accessibility": "Easy access from Gangtok, well-maintained paths",
-        "cultural_importance": "Spiritual center of Gangtok, important meditation site",
-        "festivals": [
-            {
-                "name": "Buddha Jayanti",
-                "date": "May",
-                "description": "Celebrates Buddha's birth with prayers and offerings",
-                "significance": "Special prayers and circumambulation of the stupa"
-            },
-            {
-                "name": "Tse Chu",
-                "date": "October",
-                "description": "Sacred day for accumulating merit through prayers",
-                "significance": "Believed to multiply positive karma"
-            }
-        ],
-        "travel_info": {
-            "best_time_to_visit": "Year-round, especially early morning for prayers",
-            "nearest_airport": "Bagdogra Airport (124 km)",
-            "accommodation": ["Hotels in Gangtok", "Nearby guest houses"],
-            "local_transport": "Walking distance from city center, local taxis available",
-            "permits_required": "None",
-            "weather_info": "Pleasant climate, covered walkways for rainy season"
-        }
-    },
-    {
-        "name": "Khecheopalri Monastery",
-        "location": "Khecheopalri, West Sikkim",
-        "district": "West Sikkim",
-        "altitude": "1,700 meters",
-        "tradition": "Nyingma School of Tibetan Buddhism",
-        "description": "Located near the sacred Khecheopalri Lake (Wishing Lake), this monastery is surrounded by pristine forests and is considered highly sacred.",
-        "founded": "Unknown (ancient)",
-        "architecture": "Simple traditional architecture in harmony with nature",
-        "spiritual_significance": "Sacred lake monastery, fulfills devotees' wishes",
-        "main_image": "https://images.pexels.com/photos/6576294/pexels-photo-6576294.jpeg",
-        "gallery_images": [
-            "https://images.pexels.com/photos/6576294/pexels-photo-6576294.jpeg",
-            "https://images.unsplash.com/photo-1755011310512-38cfb597241c",
-            "https://images.pexels.com/photos/2408167/pexels-photo-2408167.jpeg"
-        ],
-        "panoramic_images": [
-            "https://images.unsplash.com/photo-1587474260584-136574528ed5?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1613773332572-7825c9f74049?w=2400&h=1200&fit=crop",
-            "https://images.unsplash.com/photo-1518709268805-4e9042af2176?w=2400&h=1200&fit=crop"
-        ],
-        "coordinates": {"lat": 27.3167, "lng": 88.2000},
-        "highlights": ["Sacred Wishing Lake", "Forest Trek", "Bird Watching", "Prayer Flags"],
-        "visiting_hours": "Dawn to Dusk",
-        "entrance_fee": "₹0",
-        "accessibility": "Moderate trek through forest, well-marked trail",
-        "cultural_importance": "Sacred pilgrimage site, both Buddhist and Hindu significance",
-        "festivals": [
-            {
-                "name": "Maghe Sankranti",
-                "date": "January",
-                "description": "Sacred bathing and prayers at the lake",
-                "significance": "Purification of sins and fulfillment of wishes"
-            },
-            {
-                "name": "Drupka Teshi",
-                "date": "July/August",
-                "description": "Celebrates Buddha's first teaching",
-                "significance": "Special prayers and teachings at the monastery"
-            }
-        ],
-        "travel_info": {
-            "best_time_to_visit": "March to June, September to December",
-            "nearest_airport": "Bagdogra Airport (150 km)",
-            "accommodation": ["Eco-lodges near lake", "Hotels in Pelling (30 km)"],
-            "local_transport": "Jeeps from Pelling, then 30-minute forest walk",
-            "permits_required": "Inner Line Permit for non-Indians",
-            "weather_info": "Cool and misty, leeches during monsoon, beautiful in winter"
-        }
-    }
-]
+    _start_date = field_validator("start_date")(normalize_event_date)
+    _end_date = field_validator("end_date")(normalize_event_date)
 
-# Cultural Events Data
-cultural_events_data = [
-    {
-        "title": "Losar - Tibetan New Year",
-        "description": "The most important festival in the Tibetan calendar, marking the beginning of the new year with prayers, festivities, and cultural performances.",
-        "event_type": "festival",
-        "start_date": "2024-02-10",
-        "end_date": "2024-02-12",
-        "location": "All Sikkim Monasteries",
-        "significance": "Celebration of new beginnings, purification of negative karma, and welcoming prosperity",
-        "traditions": ["Tibetan Buddhism", "Nyingma", "Kagyu"],
-        "activities": ["Prayer ceremonies", "Cham dances", "Traditional music", "Feast preparation", "Monastery decorations"],
-        "visitor_info": "Visitors welcome to observe ceremonies. Traditional dress appreciated. Photography may be restricted during sacred rituals.",
-        "image_url": "https://images.unsplash.com/photo-1578662996442-48f60103fc96",
-        "is_recurring": true
-    },
-    {
-        "title": "Saga Dawa - Buddha's Enlightenment",
-        "description": "Sacred month celebrating Buddha's birth, enlightenment, and parinirvana. The most holy period in Buddhist calendar.",
-        "event_type": "festival",
-        "start_date": "2024-05-23",
-        "end_date": "2024-06-22",
-        "location": "All Sikkim Monasteries",
-        "significance": "Triple blessed month - merit from good deeds multiplied 100,000 times",
-        "traditions": ["Tibetan Buddhism", "Nyingma", "Kagyu"],
-        "activities": ["Continuous prayers", "Merit accumulation", "Butter lamp offerings", "Pilgrimage walks", "Vegetarian meals"],
-        "visitor_info": "Ideal time for monastery visits. Many locals observe vegetarianism. Early morning prayers highly recommended.",
-        "image_url": "https://images.unsplash.com/photo-1599735462307-c8842d0f6afe",
-        "is_recurring": true
-    },
-    {
-        "title": "Rumtek Monastery Annual Festival",
-        "description": "Grand celebration at the seat of Karmapa with sacred Cham dances, traditional music, and spiritual teachings.",
-        "event_type": "ceremony",
-        "start_date": "2024-03-15",
-        "end_date": "2024-03-17",
-        "monastery_id": "",  # Will be set programmatically
-        "monastery_name": "Rumtek Monastery",
-        "location": "Rumtek, East Sikkim",
-        "significance": "Annual purification and blessing ceremony for the Kagyu lineage",
-        "traditions": ["Kagyu School"],
-        "activities": ["Masked Cham dances", "Traditional horns and drums", "Blessing ceremonies", "Cultural exhibitions"],
-        "visitor_info": "Arrive early for best viewing. Comfortable shoes recommended for standing. Local food stalls available.",
-        "image_url": "https://images.unsplash.com/photo-1571931792680-4f7bba7bcd9d",
-        "is_recurring": true
-    },
-    {
-        "title": "Pang Lhabsol - Mount Khangchendzonga Festival",
-        "description": "Unique Sikkimese festival honoring Mount Khangchendzonga, the guardian deity of Sikkim, with warrior dances and offerings.",
-        "event_type": "cultural_event",
-        "start_date": "2024-09-04",
-        "end_date": "2024-09-04",
-        "location": "All Sikkim Monasteries and Public Grounds",
-        "significance": "Worship of Sikkim's patron deity and celebration of Sikkimese identity",
-        "traditions": ["Sikkimese Buddhism", "Lepcha traditions"],
-        "activities": ["Warrior dances", "Traditional archery", "Mountain blessing rituals", "Cultural performances"],
-        "visitor_info": "State holiday in Sikkim. Spectacular views of Khangchendzonga weather permitting. Traditional Sikkimese attire common.",
-        "image_url": "https://images.unsplash.com/photo-1506905925346-21bda4d32df4",
-        "is_recurring": true
+    @model_validator(mode="after")
+    def _end_not_before_start(self):
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+class ItineraryRequest(BaseModel):
+    monastery_ids: List[str] = Field(..., min_length=1, max_length=40)
+    start_date: str  # ISO format date of the first day
+    days: int = Field(..., ge=1, le=21)
+    start: Optional[Dict[str, float]] = None  # {"lat", "lng"}; defaults to Gangtok
+    day_start: str = "08:00"
+    day_end: str = "18:00"
+    visit_minutes: int = Field(90, ge=15, le=480)  # Time spent at each monastery
+
+# Seed data
+# The seed catalog lives in versioned JSON files under seed/ and is read only
+# when an initialize or sync endpoint runs, so it is not held by every worker
+# and a broken file fails that sync instead of the whole API's import.
+# Check the files with `python check_seed.py`.
+SEED_DIR = ROOT_DIR / 'seed'
+SEED_FORMAT_VERSION = 1
+
+class SeedDataError(Exception):
+    """A seed file is missing, unreadable or has records that do not fit their model"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+def load_seed(name: str, model, natural_key: str) -> List[dict]:
+    """Read and validate a seed file, returning its records"""
+    path = SEED_DIR / f"{name}.json"
+    try:
+        with open(path, encoding="utf-8") as f:
+            content = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise SeedDataError([f"{path.name}: {e}"])
+    if not isinstance(content, dict) or content.get("version") != SEED_FORMAT_VERSION:
+        raise SeedDataError([f"{path.name}: expected format version {SEED_FORMAT_VERSION}"])
+    records = content.get("records")
+    if not isinstance(records, list):
+        raise SeedDataError([f"{path.name}: 'records' must be a list"])
+    
+    errors = []
+    seen = set()
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append(f"{path.name}[{index}]: record must be an object")
+            continue
+        try:
+            model(**record)
+        except ValidationError as e:
+            errors.extend(f"{path.name}[{index}] {'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors())
+            continue
+        key = record[natural_key]
+        if key in seen:
+            errors.append(f"{path.name}[{index}]: duplicate {natural_key} {key!r}")
+        seen.add(key)
+    if errors:
+        raise SeedDataError(errors)
+    return records
+
+def load_monastery_seed() -> List[dict]:
+    return load_seed("monasteries", SikkimMonastery, "name")
+
+def load_cultural_event_seed() -> List[dict]:
+    return load_seed("cultural_events", CulturalEvent, "title")
+
+# Travel guide content, also indexed for the AI guide
+SIKKIM_TRAVEL_GUIDE = {
+    "permits": {
+        "inner_line_permit": "Required for non-Indians visiting most areas",
+        "how_to_get": "Online application or at checkpoints",
+        "duration": "15-30 days",
+        "documents": "Valid ID proof, passport photos"
     },
-    {
-        "title": "Drupka Teshi - First Sermon Festival",
-        "description": "Celebrates Buddha's first teaching of the Four Noble Truths at Sarnath, marking the beginning of Buddhist doctrine.",
-        "event_type": "festival",
-        "start_date": "2024-07-21",
-        "end_date": "2024-07-21",
-        "location": "All Sikkim Monasteries",
-        "significance": "Commemoration of the founding of Buddhist teachings and the Sangha community",
-        "traditions": ["Tibetan Buddhism", "Nyingma", "Kagyu"],
-        "activities": ["Teaching sessions", "Community prayers", "Merit-making activities", "Dharma discussions"],
-        "visitor_info": "Excellent opportunity to hear Buddhist teachings. English translations often available. Respectful silence during sessions.",
-        "image_url": "https://images.unsplash.com/photo-1544191696-15693072cfc5",
-        "is_recurring": true
+    "best_time": {
+        "peak_season": "March to June, September to December",
+        "monsoon": "July-August (avoid due to landslides)",
+        "winter": "December-February (cold but clear views)",
+        "festival_time": "February-March for major festivals"
     },
-    {
-        "title": "Enchey Monastery Cham Dance",
-        "description": "Traditional masked dance festival at Enchey Monastery, featuring elaborate costumes and ancient choreography.",
-        "event_type": "ceremony",
-        "start_date": "2024-12-18",
-        "end_date": "2024-12-19",
-        "monastery_id": "",  # Will be set programmatically
-        "monastery_name": "Enchey Monastery",
-        "location": "Enchey, Gangtok",
-        "significance": "Ritual dance to ward off evil spirits and bring blessings for the new year",
-        "traditions": ["Nyingma School"],
-        "activities": ["Sacred Cham dances", "Ritual music", "Blessing ceremonies", "Monastery tours"],
-        "visitor_info": "Winter clothing essential. Limited seating - arrive early. Hot butter tea served to visitors.",
-        "image_url": "https://images.unsplash.com/photo-1578320339911-b3b8ba064e4b",
-        "is_recurring": true
+    "getting_there": {
+        "nearest_airport": "Bagdogra Airport (West Bengal)",
+        "nearest_railway": "New Jalpaiguri (NJP)",
+        "road_access": "NH10 from West Bengal",
+        "local_transport": "Shared jeeps, private taxis, government buses"
     },
-    {
-        "title": "Tashiding Monastery Sacred Water Festival",
-        "description": "Holy water ceremony at Tashiding, where blessed water is believed to cleanse all sins with just a sip.",
-        "event_type": "ceremony",
-        "start_date": "2024-02-24",
-        "end_date": "2024-02-24",
-        "monastery_id": "",  # Will be set programmatically
-        "monastery_name": "Tashiding Monastery",
-        "location": "Tashiding, West Sikkim",
-        "significance": "Sacred water blessing believed to purify sins and grant spiritual merit",
-        "traditions": ["Nyingma School"],
-        "activities": ["Water blessing ritual", "Sacred chanting", "Community prayers", "Pilgrimage walk"],
-        "visitor_info": "Steep climb to monastery. Carry water bottles. Sacred water distribution after ceremony. Early morning ceremony.",
-        "image_url": "https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d",
-        "is_recurring": true
+    "accommodation": {
+        "types": ["Luxury hotels", "Budget hotels", "Guest houses", "Homestays"],
+        "booking_tips": "Book in advance during peak season",
+        "monastery_stays": "Some monasteries offer basic accommodation"
     },
-    {
-        "title": "Khecheopalri Lake Blessing Ceremony",
-        "description": "Annual blessing at the sacred wishing lake, combining Buddhist and Hindu traditions in a unique Sikkimese ceremony.",
-        "event_type": "ceremony",
-        "start_date": "2024-04-14",
-        "end_date": "2024-04-14",
-        "monastery_id": "",  # Will be set programmatically
-        "monastery_name": "Khecheopalri Monastery",
-        "location": "Khecheopalri Lake, West Sikkim",
-        "significance": "Sacred lake ceremony for wish fulfillment and spiritual purification",
-        "traditions": ["Nyingma School", "Hindu Traditions"],
-        "activities": ["Lake blessing ritual", "Prayer flag installation", "Wish making ceremony", "Nature meditation"],
-        "visitor_info": "30-minute forest walk to reach lake. Eco-friendly practices enforced. No littering. Peaceful atmosphere maintained.",
-        "image_url": "https://images.unsplash.com/photo-1506905925346-21bda4d32df4",
-        "is_recurring": true
-    }
-]
+    "important_tips": [
+        "Carry warm clothes even in summer",
+        "Respect photography restrictions in monasteries",
+        "Remove shoes before entering prayer halls",
+        "Don't point feet towards Buddha statues",
+        "Carry cash as ATMs are limited in remote areas",
+        "Stay hydrated at high altitudes"
+    ]
+}
+TRAVEL_GUIDE_ETAG = make_etag(json.dumps(SIKKIM_TRAVEL_GUIDE, sort_keys=True))
 
 @api_router.get("/")
 async def root():
@@ -617,204 +1320,965 @@ async def get_status_checks():
     status_checks = await db.status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+# Catalog sync
+# Seed data is applied as a diff: documents are matched by natural key, keep
+# their ids (so bookings and events stay linked), and are only written when
+# their content hash changed. New documents get ids derived from their
+# natural key, so every environment seeded from the same data agrees on them.
+CATALOG_ID_NAMESPACE = uuid.UUID("6f1c2b8e-3d4a-5e6f-8a9b-0c1d2e3f4a5b")
+SYNC_EXCLUDED_FIELDS = ("id", "created_at", "updated_at", "content_hash")
+catalog_sync_lock = asyncio.Lock()
+
+def content_hash(document: dict) -> str:
+    body = {k: v for k, v in document.items() if k not in SYNC_EXCLUDED_FIELDS}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+def stable_id(kind: str, natural_key: str) -> str:
+    return str(uuid.uuid5(CATALOG_ID_NAMESPACE, f"{kind}:{natural_key}"))
+
+async def sync_collection(collection, kind: str, records: List[dict], model, natural_key: str, dry_run: bool) -> dict:
+    """Upsert records by natural key in one bulk_write, touching only documents whose content changed
+
+    Returns the changeset and the id every natural key has (or will have).
+    """
+    existing = {
+        doc[natural_key]: doc
+        async for doc in collection.find({}, {"_id": 0, "id": 1, natural_key: 1, "content_hash": 1})
+    }
+    changes = {"created": [], "updated": [], "unchanged": [], "not_in_seed": []}
+    ids = {key: doc['id'] for key, doc in existing.items()}
+    operations = []
+    now = datetime.now(timezone.utc)
+    for record in records:
+        key = record[natural_key]
+        current = existing.get(key)
+        document = model(**{**record, "id": current["id"] if current else stable_id(kind, key)}).dict()
+        digest = content_hash(document)
+        ids[key] = document['id']
+        if current and current.get('content_hash') == digest:
+            changes["unchanged"].append(key)
+            continue
+        body = {k: v for k, v in document.items() if k not in SYNC_EXCLUDED_FIELDS}
+        operations.append(UpdateOne(
+            {natural_key: key},
+            {"$set": {**body, "content_hash": digest, "updated_at": now},
+             "$setOnInsert": {"id": document['id'], "created_at": document['created_at']}},
+            upsert=True
+        ))
+        changes["updated" if current else "created"].append(key)
+    seeded = {record[natural_key] for record in records}
+    # Documents added through the API are reported, never deleted
+    changes["not_in_seed"] = sorted(key for key in existing if key not in seeded)
+    if operations and not dry_run:
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Another worker's sync inserted the same natural key first; the
+            # unique index stopped the duplicate, so retrying updates its document
+            if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            await collection.bulk_write(operations, ordered=False)
+    return {"changes": changes, "ids": ids, "writes": 0 if dry_run else len(operations)}
+
+def sync_summary(changes: dict) -> dict:
+    return {name: len(keys) for name, keys in changes.items()}
+
+async def sync_monasteries(dry_run: bool = False) -> dict:
+    records = [{**data, **monastery_facts(data)} for data in load_monastery_seed()]
+    result = await sync_collection(db.sikkim_monasteries, "monastery", records, SikkimMonastery, "name", dry_run)
+    if result["writes"]:
+        await publish_catalog_write()
+        await rebuild_retrieval_index("sikkim_monasteries")
+    return result
+
+async def sync_cultural_events(monastery_ids: Dict[str, str], dry_run: bool = False) -> dict:
+    records = []
+    for data in load_cultural_event_seed():
+        record = dict(data)
+        # Link events to their monastery by name
+        if record.get('monastery_name') in monastery_ids:
+            record['monastery_id'] = monastery_ids[record['monastery_name']]
+        records.append(record)
+    result = await sync_collection(db.cultural_events, "cultural_event", records, CulturalEvent, "title", dry_run)
+    if result["writes"]:
+        await bump_data_version("cultural_events")
+        await rebuild_retrieval_index("cultural_events")
+    return result
+
+@api_router.post("/catalog/sync")
+async def sync_catalog(dry_run: bool = Query(False, description="Report the changeset without writing")):
+    """Bring monasteries and cultural events in line with the seed data without downtime or id churn"""
+    try:
+        async with catalog_sync_lock:
+            monasteries = await sync_monasteries(dry_run)
+            # Dry runs already know the ids new monasteries will get, so event links are exact
+            events = await sync_cultural_events(monasteries["ids"], dry_run)
+    except SeedDataError as e:
+        raise HTTPException(status_code=500, detail=f"Invalid seed data: {e}")
+    return {
+        "dry_run": dry_run,
+        "monasteries": {"summary": sync_summary(monasteries["changes"]), **monasteries["changes"]},
+        "cultural_events": {"summary": sync_summary(events["changes"]), **events["changes"]}
+    }
+
 @api_router.post("/monasteries/initialize")
-async def initialize_sikkim_monasteries(force: bool = False):
-    """Initialize the database with Sikkim monastery data"""
+async def initialize_sikkim_monasteries(force: bool = False, dry_run: bool = False):
+    """Initialize the database with Sikkim monastery data
+
+    With force=True existing data is synced in place rather than replaced.
+    """
     try:
         # Check if monasteries already exist
         existing_count = await db.sikkim_monasteries.count_documents({})
         if existing_count > 0 and not force:
             return {"message": f"Database already contains {existing_count} Sikkim monasteries"}
         
-        # Clear existing data if force=True
-        if force:
-            await db.sikkim_monasteries.delete_many({})
-        
-        # Insert monastery data
-        monasteries = []
-        for data in sikkim_monasteries_data:
-            monastery = SikkimMonastery(**data)
-            monasteries.append(monastery.dict())
-        
-        result = await db.sikkim_monasteries.insert_many(monasteries)
-        return {"message": f"Successfully initialized {len(result.inserted_ids)} Sikkim monasteries"}
+        async with catalog_sync_lock:
+            result = await sync_monasteries(dry_run)
+        summary = sync_summary(result["changes"])
+        return {
+            "message": f"{'Would sync' if dry_run else 'Synced'} Sikkim monasteries: {summary['created']} created, "
+                       f"{summary['updated']} updated, {summary['unchanged']} unchanged",
+            "dry_run": dry_run,
+            **result["changes"]
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/monasteries", response_model=List[SikkimMonastery])
+@api_router.get("/monasteries", response_model=None)
 async def get_sikkim_monasteries(
+    request: Request,
     district: Optional[str] = Query(None, description="Filter by district"),
     tradition: Optional[str] = Query(None, description="Filter by tradition"),
-    search: Optional[str] = Query(None, description="Search in name or description")
+    search: Optional[str] = Query(None, description="Search in name or description"),
+    view: str = Query("full", pattern="^(full|summary)$", description="'summary' returns only the fields the card grid needs"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (overrides view)"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; all matches are returned when omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    open_at: Optional[str] = Query(None, description="Open at this time (HH:MM, Sikkim time) or 'now'"),
+    free_entry: Optional[bool] = Query(None, description="Only monasteries with (true) or without (false) free entry"),
+    max_fee: Optional[float] = Query(None, ge=0, description="Lowest entrance fee at most this many rupees"),
+    min_altitude: Optional[float] = Query(None, description="Altitude at least this many metres"),
+    max_altitude: Optional[float] = Query(None, description="Altitude at most this many metres"),
+    max_airport_km: Optional[float] = Query(None, gt=0, description="Nearest airport within this many km"),
+    airport: Optional[str] = Query(None, description="Filter by nearest airport name")
 ):
-    """Get all Sikkim monasteries with optional filtering"""
-    query = {}
+    """Get Sikkim monasteries with optional filtering, projection and cursor pagination
+
+    Results are ordered by name, or by relevance when searching. When more
+    results remain the next page's cursor is sent in the X-Next-Cursor header.
+    """
+    open_minute = None
+    if open_at:
+        open_minute = parse_clock(datetime.now(SIKKIM_TZ).strftime("%H:%M") if open_at == "now" else open_at)
+        if open_minute is None:
+            raise HTTPException(status_code=400, detail="open_at must be HH:MM or 'now'")
+    
+    catalog = await catalog_cache.get()
+    # 'now' answers change with the clock: key the ETag on the resolved minute,
+    # drop Last-Modified and make caches revalidate
+    live = open_at == "now"
+    policy = "live" if live else "catalog"
+    last_modified = None if live else catalog.last_modified
+    etag = catalog_etag(catalog, request)
+    if live:
+        etag = make_etag(etag, open_minute)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, policy, last_modified)
+    monasteries = catalog.monasteries
     
+    mask = catalog.attributes.mask(open_minute, free_entry, max_fee, min_altitude, max_altitude, max_airport_km, airport)
+    if mask is not None:
+        monasteries = [m for m, keep in zip(monasteries, mask) if keep]
     if district:
-        query["district"] = {"$regex": district, "$options": "i"}
+        monasteries = [m for m in monasteries if district.lower() in m['district'].lower()]
     if tradition:
-        query["tradition"] = {"$regex": tradition, "$options": "i"}
+        monasteries = [m for m in monasteries if tradition.lower() in m['tradition'].lower()]
     if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}},
-            {"location": {"$regex": search, "$options": "i"}}
-        ]
+        # Rank by relevance using the catalog's inverted index
+        ranked = catalog.search_index.search(search, k=len(catalog.monasteries), prefix=True)
+        allowed = {m['id'] for m in monasteries}
+        keyed = [(["s", -round(r['score'], 6), r['title'], r['source']], catalog.by_id[r['source']])
+                 for r in ranked if r['source'] in allowed]
+        cursor_shape = (str, (int, float), str, str)
+    else:
+        keyed = [(["n", m['name'], m['id']], m) for m in monasteries]
+        cursor_shape = (str, str, str)
+    
+    if cursor:
+        # Keys are tagged with their ordering, so a cursor from the other mode is rejected
+        after = decode_cursor(cursor, cursor_shape)
+        if after[0] != ("s" if search else "n"):
+            raise HTTPException(status_code=400, detail="Cursor does not match this query")
+        keyed = [(key, m) for key, m in keyed if key > after]
+    next_cursor = None
+    if limit is not None and len(keyed) > limit:
+        keyed = keyed[:limit]
+        next_cursor = encode_cursor(keyed[-1][0])
+    page = [m for _, m in keyed]
+    
+    if fields:
+        selected = ["id"] + [f.strip() for f in fields.split(",") if f.strip() and f.strip() != "id"]
+        unknown = [f for f in selected if f not in SikkimMonastery.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        payload = [project_document(m, selected) for m in page]
+    elif view == "summary":
+        payload = [project_document(m, MONASTERY_SUMMARY_FIELDS) for m in page]
+    else:
+        payload = serialize_documents(page, SikkimMonastery)
     
-    monasteries = await db.sikkim_monasteries.find(query).to_list(length=None)
-    return [SikkimMonastery(**monastery) for monastery in monasteries]
+    response = conditional_response(request, payload, policy, etag, last_modified)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+@api_router.get("/monasteries/search")
+async def search_monasteries(
+    q: str = Query(..., min_length=1, description="Search text; the last word is matched as a prefix"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Ranked full-text search over monastery names, traditions, highlights, festivals and descriptions"""
+    started = time.perf_counter()
+    catalog = await catalog_cache.get()
+    ranked = catalog.search_index.search(q, k=limit, prefix=True)
+    results = []
+    for r in ranked:
+        results.append({
+            **project_document(catalog.by_id[r['source']], MONASTERY_SUMMARY_FIELDS),
+            "score": round(r['score'], 4),
+            "matched": r['matched']
+        })
+    took_ms = (time.perf_counter() - started) * 1000
+    if took_ms > SEARCH_LATENCY_BUDGET_MS:
+        logger.warning(f"Monastery search for {q!r} took {took_ms:.1f}ms (budget {SEARCH_LATENCY_BUDGET_MS}ms)")
+    return {"query": q, "results": results, "took_ms": round(took_ms, 3)}
+
+def located_monasteries(catalog: "CatalogSnapshot", matches: List[tuple]) -> List[dict]:
+    return [
+        {**project_document(catalog.by_id[monastery_id], MONASTERY_SUMMARY_FIELDS), "distance_km": round(distance, 3)}
+        for monastery_id, distance in matches
+    ]
+
+@api_router.get("/monasteries/nearby")
+async def get_nearby_monasteries(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: Optional[float] = Query(None, gt=0, le=1000, description="Search radius in km; nearest regardless of distance when omitted"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Monasteries nearest a point, sorted by distance"""
+    catalog = await catalog_cache.get()
+    etag = catalog_etag(catalog, request)
+    if is_not_modified(request, etag, catalog.last_modified):
+        return not_modified_response(etag, "catalog", catalog.last_modified)
+    matches = catalog.geo_index.nearby(lat, lng, radius, limit)
+    return conditional_response(request, {
+        "results": located_monasteries(catalog, matches)
+    }, "catalog", etag, catalog.last_modified)
+
+@api_router.get("/monasteries/within")
+async def get_monasteries_within(
+    request: Request,
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    limit: int = Query(100, ge=1, le=500)
+):
+    """Monasteries inside a bounding box, sorted by distance from its centre"""
+    if south > north:
+        raise HTTPException(status_code=422, detail="south must not be greater than north")
+    catalog = await catalog_cache.get()
+    etag = catalog_etag(catalog, request)
+    if is_not_modified(request, etag, catalog.last_modified):
+        return not_modified_response(etag, "catalog", catalog.last_modified)
+    matches = catalog.geo_index.within(south, west, north, east, limit)
+    return conditional_response(request, {
+        "results": located_monasteries(catalog, matches)
+    }, "catalog", etag, catalog.last_modified)
 
 @api_router.get("/monasteries/{monastery_id}", response_model=SikkimMonastery)
-async def get_monastery(monastery_id: str):
+async def get_monastery(monastery_id: str, request: Request):
     """Get a specific Sikkim monastery by ID"""
-    monastery = await db.sikkim_monasteries.find_one({"id": monastery_id})
+    catalog = await catalog_cache.get()
+    monastery = catalog.by_id.get(monastery_id)
     if not monastery:
         raise HTTPException(status_code=404, detail="Monastery not found")
-    return SikkimMonastery(**monastery)
+    etag = catalog_etag(catalog, request)
+    if is_not_modified(request, etag, catalog.last_modified):
+        return not_modified_response(etag, "catalog", catalog.last_modified)
+    return conditional_response(request, serialize_documents([monastery], SikkimMonastery)[0], "catalog", etag, catalog.last_modified)
+
+@api_router.get("/monasteries/{monastery_id}/similar")
+async def get_similar_monasteries(
+    monastery_id: str,
+    request: Request,
+    limit: int = Query(5, ge=1, le=SIMILAR_TOP_K)
+):
+    """Monasteries most like this one by tradition, district, distance, altitude, highlights and festivals"""
+    catalog = await catalog_cache.get()
+    if monastery_id not in catalog.by_id:
+        raise HTTPException(status_code=404, detail="Monastery not found")
+    etag = catalog_etag(catalog, request)
+    if is_not_modified(request, etag, catalog.last_modified):
+        return not_modified_response(etag, "catalog", catalog.last_modified)
+    similarity_table.sync(catalog)
+    results = [
+        {**project_document(catalog.by_id[n["id"]], MONASTERY_SUMMARY_FIELDS), "score": n["score"], "distance_km": n["distance_km"]}
+        for n in similarity_table.get(monastery_id)[:limit]
+    ]
+    return conditional_response(request, {"results": results}, "catalog", etag, catalog.last_modified)
 
 @api_router.post("/monasteries", response_model=SikkimMonastery)
 async def create_monastery(monastery: MonasteryCreate):
     """Create a new Sikkim monastery"""
-    new_monastery = SikkimMonastery(**monastery.dict())
-    await db.sikkim_monasteries.insert_one(new_monastery.dict())
+    new_monastery = SikkimMonastery(**monastery.dict(), **monastery_facts(monastery.dict()))
+    try:
+        await db.sikkim_monasteries.insert_one(new_monastery.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"A monastery named {monastery.name} already exists")
+    catalog = await publish_catalog_write()
+    index_monastery(new_monastery.dict())
+    if catalog:
+        similarity_table.sync(catalog)
     return new_monastery
 
-@api_router.post("/chat")
-async def chat_with_monastery_guide(request: ChatRequest):
-    """Chat with AI guide about Sikkim monasteries and Buddhist culture"""
-    try:
-        if not OPENAI_API_KEY:
-            raise HTTPException(status_code=500, detail="AI service not configured")
-        
-        # Get monastery context if monastery_id is provided
-        monastery_context = ""
-        if request.monastery_id:
-            monastery = await db.sikkim_monasteries.find_one({"id": request.monastery_id})
-            if monastery:
-                monastery_context = f"""
-Current Monastery Context:
-Name: {monastery['name']}
-Location: {monastery['location']}, {monastery['district']}
-Altitude: {monastery['altitude']}
-Tradition: {monastery['tradition']}
-Founded: {monastery['founded']}
-Description: {monastery['description']}
-Architecture: {monastery['architecture']}
-Spiritual Significance: {monastery['spiritual_significance']}
-Cultural Importance: {monastery['cultural_importance']}
-Highlights: {', '.join(monastery['highlights'])}
-Visiting Hours: {monastery['visiting_hours']}
-Festivals: {', '.join([f["name"] for f in monastery['festivals']])}
-Travel Info: Best time - {monastery['travel_info']['best_time_to_visit']}
-"""
-        
-        # Create system message with comprehensive knowledge
-        system_message = f"""You are a knowledgeable AI assistant with expertise in multiple areas, with special focus on Sikkim monasteries and Buddhist culture. You can help users with:
-
-**Primary Expertise - Sikkim & Buddhism:**
-- All major monasteries in Sikkim (Rumtek, Pemayangtse, Enchey, Tashiding, Do-drul Chorten, Khecheopalri)
-- Tibetan Buddhist traditions (Nyingma, Kagyu schools)
-- Sikkim's unique Buddhist culture and festivals
-- Himalayan geography and travel in Sikkim
-- Local customs, permits, and travel logistics
-- Sacred sites and pilgrimage routes
-- Buddhist philosophy, practices, and teachings
-
-**General Knowledge Areas:**
-- Travel and tourism advice
-- Cultural and historical information
-- General questions about Buddhism and spirituality
-- Geography, science, technology
-- Lifestyle and wellness topics
-- Educational content
-- Current events and general knowledge
-
-{monastery_context}
+@api_router.get("/catalog/metrics")
+async def get_catalog_metrics():
+    """Get monastery catalog cache counters"""
+    return {**catalog_cache.stats(), "similarity": similarity_table.stats()}
+
+@api_router.post("/catalog/refresh")
+async def refresh_catalog():
+    """Reload the monastery catalog cache from the database, in every worker"""
+    snapshot = await publish_catalog_write()
+    return {"message": f"Catalog refreshed with {len(snapshot.monasteries)} monasteries", "version": snapshot.version}
+
+def monastery_chunks(monastery: dict) -> List[tuple]:
+    """Split a monastery document into retrievable (title, text) chunks"""
+    name = monastery['name']
+    travel = monastery['travel_info']
+    chunks = [
+        (f"{name} overview", f"{name} in {monastery['location']}, {monastery['district']}. Altitude {monastery['altitude']}. "
+            f"{monastery['tradition']}, founded {monastery['founded']}. {monastery['description']} "
+            f"{monastery['spiritual_significance']}. {monastery['cultural_importance']}."),
+        (f"{name} architecture and highlights", f"{monastery['architecture']}. Highlights: {', '.join(monastery['highlights'])}."),
+        (f"{name} visiting", f"Visiting hours: {monastery['visiting_hours']}. Entrance fee: {monastery['entrance_fee']}. "
+            f"Accessibility: {monastery['accessibility']}."),
+        (f"{name} travel", f"Best time to visit: {travel['best_time_to_visit']}. Nearest airport: {travel['nearest_airport']}. "
+            f"Accommodation: {', '.join(travel['accommodation'])}. Local transport: {travel['local_transport']}. "
+            f"Permits: {travel['permits_required']}. Weather: {travel['weather_info']}.")
+    ]
+    for festival in monastery.get('festivals', []):
+        chunks.append((f"{festival['name']} at {name}",
+            f"{festival['date']}. {festival['description']}. {festival['significance']}."))
+    return chunks
+
+def event_dates_text(event: dict) -> str:
+    """When the event is held; recurring events list this and next year's occurrences"""
+    if not event.get('is_recurring'):
+        return f"from {event['start_date']} to {event['end_date']}"
+    # The stored dates are only the first occurrence, so they would go stale
+    this_year = datetime.now(timezone.utc).year
+    held = []
+    for year in (this_year, this_year + 1):
+        try:
+            occurrence = expand_event(event, year)
+        except ValueError:
+            continue
+        if occurrence:
+            approximate = " (approximate)" if occurrence['approximate'] else ""
+            held.append(f"{year} from {occurrence['start_date']} to {occurrence['end_date']}{approximate}")
+    return f"held every year, in {' and in '.join(held)}" if held else "held every year"
+
+def event_chunks(event: dict) -> List[tuple]:
+    where = event.get('monastery_name') or event['location']
+    return [(f"{event['title']} ({where})",
+        f"{event['event_type'].replace('_', ' ')} {event_dates_text(event)} at {event['location']}. "
+        f"{event['description']} {event['significance']}. Activities: {', '.join(event['activities'])}. "
+        f"Traditions: {', '.join(event['traditions'])}. {event['visitor_info']}")]
+
+def travel_guide_chunks(guide: dict) -> List[tuple]:
+    chunks = []
+    for section, content in guide.items():
+        if isinstance(content, dict):
+            text = ". ".join(f"{key.replace('_', ' ')}: {', '.join(value) if isinstance(value, list) else value}"
+                             for key, value in content.items())
+        else:
+            text = ". ".join(content)
+        chunks.append((f"Sikkim travel guide - {section.replace('_', ' ')}", text))
+    return chunks
+
+def index_monastery(monastery: dict):
+    retrieval_index.upsert(f"monastery:{monastery['id']}", monastery_chunks(monastery))
+    invalidate_cached_answers()
+
+def index_cultural_event(event: dict):
+    retrieval_index.upsert(f"event:{event['id']}", event_chunks(event))
+    invalidate_cached_answers()
+
+async def rebuild_retrieval_index(collection: Optional[str] = None):
+    """Re-index monasteries and/or cultural events from the database"""
+    if collection in (None, "sikkim_monasteries"):
+        retrieval_index.clear("monastery:")
+        async for monastery in db.sikkim_monasteries.find():
+            retrieval_index.upsert(f"monastery:{monastery['id']}", monastery_chunks(monastery))
+    if collection in (None, "cultural_events"):
+        retrieval_index.clear("event:")
+        async for event in db.cultural_events.find():
+            retrieval_index.upsert(f"event:{event['id']}", event_chunks(event))
+    if collection is None:
+        retrieval_index.upsert("guide:travel", travel_guide_chunks(SIKKIM_TRAVEL_GUIDE))
+    invalidate_cached_answers()
+
+def build_guide_prompt(message: str, monastery_id: Optional[str] = None):
+    """Build the system prompt for the AI guide, returning it with the monastery context used"""
+    # The monastery being viewed is always in context; the rest is retrieved per question
+    pinned = retrieval_index.chunks_for(f"monastery:{monastery_id}")[:1] if monastery_id else []
+    monastery_context = pinned[0]["text"] if pinned else ""
+    pinned_titles = {chunk["title"] for chunk in pinned}
+    retrieved = [c for c in retrieval_index.search(message) if c["title"] not in pinned_titles]
+    context = "\n".join(f"- {chunk['title']}: {chunk['text']}" for chunk in pinned + retrieved)
+    
+    system_message = f"""You are a friendly AI guide specializing in Sikkim monasteries, Tibetan Buddhist traditions, festivals and travel in Sikkim. You can also answer general questions.
+
+Reference notes (use them when relevant, do not invent facts beyond them for Sikkim specifics):
+{context or "- No matching reference notes."}
 
 Guidelines:
-- For Sikkim/Buddhist questions: Provide detailed, accurate information with practical travel advice
-- For general questions: Give helpful, accurate answers while being concise
-- Always be respectful when discussing religious or cultural topics
+- Be accurate and practical for Sikkim/Buddhist questions, concise for general ones
+- Be respectful when discussing religious or cultural topics
 - If unsure about something, acknowledge the limitation
-- Maintain a friendly, conversational tone
-- When relevant, connect topics back to Buddhist wisdom or Sikkim culture
-- Keep responses informative but engaging (2-4 paragraphs depending on complexity)
+- Keep responses to 2-4 paragraphs
 """
+    return system_message, monastery_context
+
+def guide_messages(system_message: str, message: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": message}
+    ]
+
+async def save_chat_message(request: ChatRequest, ai_response: str):
+    chat_message = ChatMessage(
+        session_id=request.session_id,
+        user_message=request.message,
+        ai_response=ai_response,
+        monastery_context=request.monastery_id
+    )
+    await db.chat_messages.insert_one(chat_message.dict())
+    return chat_message
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+@api_router.post("/chat")
+async def chat_with_monastery_guide(request: ChatRequest, idempotency_key: Optional[str] = Header(None)):
+    """Chat with AI guide about Sikkim monasteries and Buddhist culture
+
+    Retries sent with the same Idempotency-Key header get the original answer
+    instead of another completion.
+    """
+    if idempotency_key:
+        return await run_idempotent("chat", idempotency_key, request, lambda: answer_guide_question(request))
+    return await answer_guide_question(request)
+
+async def answer_guide_question(request: ChatRequest) -> dict:
+    try:
+        llm = get_openai_client()
+        cache_key = answer_cache_key(request.message, request.monastery_id)
+        cached = None if request.bypass_cache else answer_cache.get(cache_key)
         
-        # Create OpenAI client and get response
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": request.message}
-            ],
-            max_tokens=500,
-            temperature=0.7
-        )
-        
-        ai_response = response.choices[0].message.content
+        if cached:
+            ai_response, has_context = cached
+        else:
+            system_message, monastery_context = build_guide_prompt(request.message, request.monastery_id)
+            
+            # Get response from the shared async client without blocking the event loop
+            async with track_llm_call():
+                response = await llm.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=guide_messages(system_message, request.message),
+                    max_tokens=500,
+                    temperature=0.7
+                )
+            
+            ai_response = response.choices[0].message.content
+            has_context = bool(monastery_context)
+            answer_cache.set(cache_key, (ai_response, has_context))
         
         # Save chat message to database
-        chat_message = ChatMessage(
-            session_id=request.session_id,
-            user_message=request.message,
-            ai_response=ai_response,
-            monastery_context=request.monastery_id
-        )
-        await db.chat_messages.insert_one(chat_message.dict())
+        await save_chat_message(request, ai_response)
         
         return {
             "response": ai_response,
             "session_id": request.session_id,
-            "monastery_context": bool(monastery_context)
+            "monastery_context": has_context,
+            "cached": bool(cached)
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
+@api_router.post("/chat/stream")
+async def stream_chat_with_monastery_guide(request: ChatRequest, http_request: Request):
+    """Chat with AI guide, streaming tokens as Server-Sent Events"""
+    llm = get_openai_client()
+    cache_key = answer_cache_key(request.message, request.monastery_id)
+    cached = None if request.bypass_cache else answer_cache.get(cache_key)
+    
+    async def cached_stream():
+        ai_response, has_context = cached
+        yield sse_event({"session_id": request.session_id, "monastery_context": has_context, "cached": True}, event="start")
+        yield sse_event({"delta": ai_response})
+        chat_message = await save_chat_message(request, ai_response)
+        yield sse_event({"id": chat_message.id, "response": ai_response}, event="done")
+    
+    if cached:
+        return StreamingResponse(cached_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+    
+    system_message, monastery_context = build_guide_prompt(request.message, request.monastery_id)
+    
+    async def event_stream():
+        yield sse_event({"session_id": request.session_id, "monastery_context": bool(monastery_context), "cached": False}, event="start")
+        parts = []
+        completed = False
+        try:
+            async with track_llm_call():
+                stream = await llm.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=guide_messages(system_message, request.message),
+                    max_tokens=500,
+                    temperature=0.7,
+                    stream=True
+                )
+                try:
+                    async for chunk in stream:
+                        if await http_request.is_disconnected():
+                            break
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            parts.append(delta)
+                            yield sse_event({"delta": delta})
+                    else:
+                        completed = True
+                finally:
+                    # Stops upstream generation when the client goes away mid-stream
+                    await stream.response.aclose()
+        except Exception as e:
+            yield sse_event({"detail": f"AI service error: {str(e)}"}, event="error")
+            return
+        
+        if completed:
+            ai_response = "".join(parts)
+            answer_cache.set(cache_key, (ai_response, bool(monastery_context)))
+            chat_message = await save_chat_message(request, ai_response)
+            yield sse_event({"id": chat_message.id, "response": ai_response}, event="done")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/chat/metrics")
+async def get_chat_metrics():
+    """Get AI guide call counters and connection pool settings"""
+    return {
+        "configured": openai_client is not None,
+        "model": OPENAI_MODEL,
+        **llm_stats,
+        "answer_cache": answer_cache.stats(),
+        "retrieval_index": retrieval_index.stats(),
+        "pool": {
+            "max_connections": OPENAI_MAX_CONNECTIONS,
+            "max_keepalive_connections": OPENAI_MAX_KEEPALIVE,
+            "timeout": OPENAI_TIMEOUT,
+            "connect_timeout": OPENAI_CONNECT_TIMEOUT,
+            "max_retries": OPENAI_MAX_RETRIES
+        }
+    }
+
 @api_router.get("/chat/history/{session_id}")
 async def get_chat_history(session_id: str, limit: int = 20):
     """Get chat history for a session"""
     messages = await db.chat_messages.find(
-        {"session_id": session_id}
+        {"session_id": session_id}, model_projection(ChatMessage)
     ).sort("timestamp", -1).limit(limit).to_list(length=None)
     
-    return {
-        "messages": [ChatMessage(**msg) for msg in reversed(messages)],
+    return json_response({
+        "messages": serialize_documents(messages[::-1], ChatMessage),
         "session_id": session_id
-    }
+    })
 
-@api_router.post("/bookings", response_model=Booking)
-async def create_booking(booking: BookingCreate):
-    """Create a new monastery visit booking"""
+# Booking slot inventory
+# One document per (monastery, date, time, tour type) holding capacity and
+# remaining places. Reservations are a single conditional $inc, so
+# concurrent bookings can never take the same places twice.
+SLOT_CAPACITY = {
+    'self_guided': int(os.environ.get('SLOT_CAPACITY_SELF_GUIDED', '100')),
+    'guided_tour': int(os.environ.get('SLOT_CAPACITY_GUIDED_TOUR', '25')),
+    'spiritual_session': int(os.environ.get('SLOT_CAPACITY_SPIRITUAL_SESSION', '15'))
+}
+DEFAULT_SLOT_CAPACITY = int(os.environ.get('SLOT_CAPACITY_DEFAULT', '25'))
+
+def slot_key(monastery_id: str, visit_date: str, visit_time: str, tour_type: str) -> dict:
+    return {"monastery_id": monastery_id, "visit_date": visit_date, "visit_time": visit_time, "tour_type": tour_type}
+
+async def ensure_slot(key: dict):
+    """Create the slot with its default capacity if it does not exist yet"""
+    capacity = SLOT_CAPACITY.get(key["tour_type"], DEFAULT_SLOT_CAPACITY)
     try:
-        # Calculate total amount based on tour type and group size
-        tour_prices = {
-            'self_guided': 0,  # Free
-            'guided_tour': 500,  # ₹500 per person
-            'spiritual_session': 300  # ₹300 per person
-        }
-        
-        base_price = tour_prices.get(booking.tour_type, 0)
-        total_amount = base_price * booking.group_size
-        
-        new_booking = Booking(
-            **booking.dict(),
-            total_amount=total_amount
+        await db.booking_slots.update_one(
+            key,
+            {"$setOnInsert": {**key, "capacity": capacity, "remaining": capacity}},
+            upsert=True
         )
+    except DuplicateKeyError:
+        pass  # A concurrent request created it first
+
+async def reserve_slot(key: dict, places: int) -> dict:
+    """Atomically take places from a slot, raising 409 when too few remain"""
+    await ensure_slot(key)
+    slot = await db.booking_slots.find_one_and_update(
+        {**key, "remaining": {"$gte": places}},
+        {"$inc": {"remaining": -places}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if slot is None:
+        current = await db.booking_slots.find_one(key, {"_id": 0, "remaining": 1})
+        remaining = current["remaining"] if current else 0
+        raise HTTPException(status_code=409, detail=f"Not enough places left for this slot ({remaining} remaining)")
+    return slot
+
+async def release_slot(key: dict, places: int):
+    # Never more than capacity, whatever a caller got wrong
+    await db.booking_slots.update_one(
+        key, [{"$set": {"remaining": {"$min": ["$capacity", {"$add": ["$remaining", places]}]}}}]
+    )
+
+@api_router.put("/slots/capacity")
+async def set_slot_capacity(slot: SlotCapacity):
+    """Set the capacity of a slot, keeping places already reserved
+
+    Returns 409 when more places are already reserved than the new capacity.
+    """
+    key = slot_key(slot.monastery_id, slot.visit_date, slot.visit_time, slot.tour_type)
+    default = SLOT_CAPACITY.get(slot.tour_type, DEFAULT_SLOT_CAPACITY)
+    current = await db.booking_slots.find_one(key, {"_id": 0, "capacity": 1, "remaining": 1})
+    if current and current["capacity"] - current["remaining"] > slot.capacity:
+        raise HTTPException(status_code=409, detail=f"{current['capacity'] - current['remaining']} places are already reserved for this slot")
+    reserved = {"$subtract": [{"$ifNull": ["$capacity", default]}, {"$ifNull": ["$remaining", default]}]}
+    try:
+        # Bookings taken since the check fail the filter, and the upsert then hits the unique key
+        updated = await db.booking_slots.find_one_and_update(
+            {**key, "$expr": {"$gte": [slot.capacity, reserved]}},
+            [{"$set": {**key, "capacity": slot.capacity, "remaining": {"$subtract": [slot.capacity, reserved]}}}],
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Slot was modified concurrently, retry")
+    return updated
+
+@api_router.get("/slots/availability")
+async def get_slot_availability(
+    monastery_id: str = Query(..., description="Monastery to check"),
+    start_date: str = Query(..., description="First visit date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="Last visit date (YYYY-MM-DD)"),
+    tour_type: Optional[str] = Query(None, description="Limit to one tour type")
+):
+    """Get remaining places per slot for a date range
+
+    Slots nobody has booked yet are not listed; they have the default capacity for their tour type.
+    """
+    query = {"monastery_id": monastery_id, "visit_date": {"$gte": start_date, "$lte": end_date}}
+    if tour_type:
+        query["tour_type"] = tour_type
+    slots = await db.booking_slots.find(query, {"_id": 0}).sort([("visit_date", 1), ("visit_time", 1)]).to_list(length=None)
+    return json_response({"slots": slots, "default_capacity": SLOT_CAPACITY})
+
+# Price per person by tour type
+TOUR_PRICES = {
+    'self_guided': 0,  # Free
+    'guided_tour': 500,  # ₹500 per person
+    'spiritual_session': 300  # ₹300 per person
+}
+
+def price_booking(booking: BookingCreate) -> Booking:
+    """Calculate total amount based on tour type and group size"""
+    return Booking(
+        **booking.dict(),
+        total_amount=TOUR_PRICES.get(booking.tour_type, 0) * booking.group_size
+    )
+
+@api_router.post("/bookings", response_model=Booking)
+async def create_booking(booking: BookingCreate, idempotency_key: Optional[str] = Header(None)):
+    """Create a new monastery visit booking
+
+    Retries sent with the same Idempotency-Key header return the original
+    booking instead of creating another one.
+    """
+    if idempotency_key:
+        return await run_idempotent("bookings", idempotency_key, booking, lambda: book_visit(booking))
+    return await book_visit(booking)
+
+async def book_visit(booking: BookingCreate) -> Booking:
+    try:
+        new_booking = price_booking(booking)
         
-        await db.bookings.insert_one(new_booking.dict())
+        key = slot_key(booking.monastery_id, booking.visit_date, booking.visit_time, booking.tour_type)
+        await reserve_slot(key, booking.group_size)
+        try:
+            # Marks bookings holding slot places; older ones never took any
+            await db.bookings.insert_one({**new_booking.dict(), "slot_reserved": True})
+        except Exception:
+            await release_slot(key, booking.group_size)
+            raise
+        await bump_data_version("bookings")
         return new_booking
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+BULK_BOOKING_MAX_ROWS = int(os.environ.get('BULK_BOOKING_MAX_ROWS', '5000'))
+
+def parse_bulk_rows(body: bytes, content_type: str) -> list:
+    try:
+        if "ndjson" in content_type:
+            return [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        rows = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of bookings")
+    return rows
+
+async def ensure_slots(keys: List[dict]):
+    if not keys:
+        return
+    requests = [
+        UpdateOne(key, {"$setOnInsert": {
+            **key,
+            "capacity": SLOT_CAPACITY.get(key["tour_type"], DEFAULT_SLOT_CAPACITY),
+            "remaining": SLOT_CAPACITY.get(key["tour_type"], DEFAULT_SLOT_CAPACITY)
+        }}, upsert=True)
+        for key in keys
+    ]
+    try:
+        await db.booking_slots.bulk_write(requests, ordered=False)
+    except BulkWriteError as e:
+        # Duplicate keys only mean a concurrent request created the slot first
+        if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+
+async def reserve_grouped(rows: List[tuple]) -> Dict[int, str]:
+    """Reserve capacity for (index, booking) rows, one atomic $inc per slot
+
+    When a slot cannot take its whole group, rows fall back to individual
+    reservations in order. Returns the error for each row that did not fit.
+    """
+    by_slot: Dict[tuple, List[tuple]] = defaultdict(list)
+    for index, booking in rows:
+        by_slot[(booking.monastery_id, booking.visit_date, booking.visit_time, booking.tour_type)].append((index, booking))
+    await ensure_slots([slot_key(*slot) for slot in by_slot])
+    
+    async def reserve_slot_rows(slot: tuple, slot_rows: List[tuple]) -> Dict[int, str]:
+        key = slot_key(*slot)
+        total = sum(booking.group_size for _, booking in slot_rows)
+        taken = await db.booking_slots.find_one_and_update(
+            {**key, "remaining": {"$gte": total}}, {"$inc": {"remaining": -total}}
+        )
+        if taken is not None:
+            return {}
+        errors = {}
+        for index, booking in slot_rows:
+            try:
+                await reserve_slot(key, booking.group_size)
+            except HTTPException as e:
+                errors[index] = e.detail
+        return errors
+    
+    errors: Dict[int, str] = {}
+    for slot_errors in await asyncio.gather(*(reserve_slot_rows(slot, r) for slot, r in by_slot.items())):
+        errors.update(slot_errors)
+    return errors
+
+@api_router.post("/bookings/bulk")
+async def create_bookings_bulk(
+    request: Request,
+    ordered: bool = Query(False, description="Stop at the first failing row instead of processing every row")
+):
+    """Create many bookings at once from a JSON array or NDJSON body (tour operators)
+
+    Rows are validated and priced in one pass, capacity is reserved per slot
+    and the bookings are written with a single insert_many. The response
+    reports the outcome of every row by its position in the upload.
+    """
+    rows = parse_bulk_rows(await request.body(), request.headers.get("content-type", ""))
+    if len(rows) > BULK_BOOKING_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_BOOKING_MAX_ROWS} bookings per request")
+    
+    results: List[dict] = [{"index": i, "status": "skipped"} for i in range(len(rows))]
+    stop_at = len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, BookingCreate.model_validate(row)))
+        except ValidationError as e:
+            errors = [{"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()]
+            results[index] = {"index": index, "status": "error", "error": errors}
+            if ordered:
+                stop_at = index
+                break
+    
+    if ordered:
+        # Reserve row by row so the first row that does not fit ends the batch
+        reserved = []
+        for index, booking in valid:
+            try:
+                await reserve_slot(slot_key(booking.monastery_id, booking.visit_date, booking.visit_time, booking.tour_type), booking.group_size)
+            except HTTPException as e:
+                results[index] = {"index": index, "status": "error", "error": e.detail}
+                stop_at = index
+                break
+            reserved.append((index, booking))
+    else:
+        capacity_errors = await reserve_grouped(valid)
+        for index, error in capacity_errors.items():
+            results[index] = {"index": index, "status": "error", "error": error}
+        reserved = [(index, booking) for index, booking in valid if index not in capacity_errors]
+    
+    priced = [(index, booking, price_booking(booking)) for index, booking in reserved if index < stop_at]
+    failed_writes: Dict[int, str] = {}
+    if priced:
+        try:
+            await db.bookings.insert_many([{**new_booking.dict(), "slot_reserved": True} for _, _, new_booking in priced], ordered=ordered)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed_writes[error["index"]] = error.get("errmsg", "Write failed")
+            if ordered:
+                first = min(failed_writes)
+                failed_writes.update({i: "Not written after an earlier failure" for i in range(first + 1, len(priced))})
+    
+    for position, (index, booking, new_booking) in enumerate(priced):
+        if position in failed_writes:
+            await release_slot(slot_key(booking.monastery_id, booking.visit_date, booking.visit_time, booking.tour_type), booking.group_size)
+            results[index] = {"index": index, "status": "error", "error": failed_writes[position]}
+        else:
+            results[index] = {"index": index, "status": "created", "id": new_booking.id, "total_amount": new_booking.total_amount}
+    
+    created = sum(1 for r in results if r["status"] == "created")
+    if created:
+        await bump_data_version("bookings")
+    return json_response({
+        "ordered": ordered,
+        "received": len(rows),
+        "created": created,
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "results": results
+    })
+
+BOOKING_EXPORT_FIELDS = list(Booking.model_fields)
+
+def booking_filter(monastery_id: Optional[str], status: Optional[str], tour_type: Optional[str],
+                   visit_date_from: Optional[str], visit_date_to: Optional[str]) -> dict:
+    query = {}
+    if monastery_id:
+        query["monastery_id"] = monastery_id
+    if status:
+        query["booking_status"] = status
+    if tour_type:
+        query["tour_type"] = tour_type
+    if visit_date_from or visit_date_to:
+        query["visit_date"] = {}
+        if visit_date_from:
+            query["visit_date"]["$gte"] = visit_date_from
+        if visit_date_to:
+            query["visit_date"]["$lte"] = visit_date_to
+    return query
+
 @api_router.get("/bookings", response_model=List[Booking])
-async def get_all_bookings():
-    """Get all bookings (admin endpoint)"""
-    bookings = await db.bookings.find().sort("created_at", -1).to_list(length=None)
-    return [Booking(**booking) for booking in bookings]
+async def get_all_bookings(
+    monastery_id: Optional[str] = Query(None, description="Filter by monastery"),
+    status: Optional[str] = Query(None, description="Filter by booking status"),
+    tour_type: Optional[str] = Query(None, description="Filter by tour type"),
+    visit_date_from: Optional[str] = Query(None, description="Visits on or after this date (YYYY-MM-DD)"),
+    visit_date_to: Optional[str] = Query(None, description="Visits on or before this date (YYYY-MM-DD)"),
+    limit: int = Query(100, ge=1, le=500, description="Page size"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page")
+):
+    """Get bookings newest first, one page at a time (admin endpoint)
+
+    The cursor for the next page is sent in the X-Next-Cursor header.
+    """
+    query = booking_filter(monastery_id, status, tour_type, visit_date_from, visit_date_to)
+    if cursor:
+        created_at, booking_id = decode_cursor(cursor, (str, str))
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": booking_id}}
+        ]
+    
+    bookings = await db.bookings.find(query, model_projection(Booking)).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(length=None)
+    
+    response = json_response(serialize_documents(bookings[:limit], Booking))
+    if len(bookings) > limit:
+        last = bookings[limit - 1]
+        response.headers["X-Next-Cursor"] = encode_cursor([last["created_at"].isoformat(), last["id"]])
+    return response
+
+@api_router.get("/bookings/export")
+async def export_bookings(
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="Export format"),
+    monastery_id: Optional[str] = Query(None, description="Filter by monastery"),
+    status: Optional[str] = Query(None, description="Filter by booking status"),
+    tour_type: Optional[str] = Query(None, description="Filter by tour type"),
+    visit_date_from: Optional[str] = Query(None, description="Visits on or after this date (YYYY-MM-DD)"),
+    visit_date_to: Optional[str] = Query(None, description="Visits on or before this date (YYYY-MM-DD)")
+):
+    """Stream matching bookings as CSV or NDJSON straight from the database cursor (admin endpoint)"""
+    query = booking_filter(monastery_id, status, tour_type, visit_date_from, visit_date_to)
+    cursor = db.bookings.find(query, model_projection(Booking)).sort([("created_at", -1), ("id", -1)]).batch_size(1000)
+    
+    async def csv_rows():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=BOOKING_EXPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        async for booking in cursor:
+            writer.writerow(booking)
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    async def ndjson_rows():
+        async for booking in cursor:
+            yield render_json(booking) + b"\n"
+    
+    filename = f"bookings-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        csv_rows() if format == "csv" else ndjson_rows(),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @api_router.get("/bookings/{booking_id}", response_model=Booking)
 async def get_booking(booking_id: str):
@@ -827,125 +2291,491 @@ async def get_booking(booking_id: str):
 @api_router.get("/bookings/email/{email}")
 async def get_bookings_by_email(email: str):
     """Get bookings by visitor email"""
-    bookings = await db.bookings.find({"visitor_email": email}).sort("created_at", -1).to_list(length=None)
-    return {"bookings": [Booking(**booking) for booking in bookings]}
+    bookings = await db.bookings.find(
+        {"visitor_email": email}, model_projection(Booking)
+    ).sort("created_at", -1).to_list(length=None)
+    return json_response({"bookings": serialize_documents(bookings, Booking)})
 
 @api_router.delete("/bookings/{booking_id}")
 async def cancel_booking(booking_id: str):
-    """Cancel a booking"""
-    result = await db.bookings.update_one(
-        {"id": booking_id},
+    """Cancel a booking and return its places to the slot, if it took any"""
+    # Only the request that flips the status releases capacity
+    booking = await db.bookings.find_one_and_update(
+        {"id": booking_id, "booking_status": {"$ne": "cancelled"}},
         {"$set": {"booking_status": "cancelled"}}
     )
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Booking not found")
+    if booking is None:
+        if not await db.bookings.count_documents({"id": booking_id}, limit=1):
+            raise HTTPException(status_code=404, detail="Booking not found")
+    else:
+        if booking.get("slot_reserved"):
+            key = slot_key(booking["monastery_id"], booking["visit_date"], booking["visit_time"], booking["tour_type"])
+            await release_slot(key, booking["group_size"])
+        await bump_data_version("bookings")
     return {"message": "Booking cancelled successfully"}
 
 
 
 @api_router.get("/districts")
-async def get_districts():
+async def get_districts(request: Request):
     """Get list of districts with monasteries"""
-    districts = await db.sikkim_monasteries.distinct("district")
-    return {"districts": sorted(districts)}
+    catalog = await catalog_cache.get()
+    etag = catalog_etag(catalog, request)
+    if is_not_modified(request, etag, catalog.last_modified):
+        return not_modified_response(etag, "catalog", catalog.last_modified)
+    return conditional_response(request, {"districts": catalog.districts}, "catalog", etag, catalog.last_modified)
 
 @api_router.get("/traditions")
-async def get_traditions():
+async def get_traditions(request: Request):
     """Get list of Buddhist traditions"""
-    traditions = await db.sikkim_monasteries.distinct("tradition")
-    return {"traditions": sorted(traditions)}
+    catalog = await catalog_cache.get()
+    etag = catalog_etag(catalog, request)
+    if is_not_modified(request, etag, catalog.last_modified):
+        return not_modified_response(etag, "catalog", catalog.last_modified)
+    return conditional_response(request, {"traditions": catalog.traditions}, "catalog", etag, catalog.last_modified)
 
 @api_router.get("/festivals")
-async def get_all_festivals():
-    """Get all festivals celebrated across Sikkim monasteries"""
-    monasteries = await db.sikkim_monasteries.find().to_list(length=None)
-    all_festivals = []
+async def get_all_festivals(
+    request: Request,
+    month: Optional[int] = Query(None, ge=1, le=12, description="Festivals that can fall in this month"),
+    monastery_id: Optional[str] = Query(None, description="Festivals celebrated at this monastery"),
+    tradition: Optional[str] = Query(None, description="Filter by the monastery's tradition"),
+    name: Optional[str] = Query(None, description="Words from the festival name")
+):
+    """Get festivals celebrated across Sikkim monasteries, optionally filtered"""
+    catalog = await catalog_cache.get()
+    etag = catalog_etag(catalog, request)
+    if is_not_modified(request, etag, catalog.last_modified):
+        return not_modified_response(etag, "catalog", catalog.last_modified)
+    festivals = catalog.festivals.find(month, monastery_id, tradition, name)
+    return conditional_response(request, {
+        "festivals": festivals,
+        "months": catalog.festivals.month_counts
+    }, "catalog", etag, catalog.last_modified)
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(
+    request: Request,
+    view: str = Query("summary", pattern="^(full|summary)$", description="Monastery representation to return"),
+    events_limit: int = Query(5, ge=0, le=50, description="Number of upcoming cultural events")
+):
+    """Everything the home screen needs in one round trip: monasteries, facets with counts and upcoming events"""
+    catalog = await catalog_cache.get()
+    if view == "summary":
+        monasteries = [project_document(m, MONASTERY_SUMMARY_FIELDS) for m in catalog.monasteries]
+    else:
+        monasteries = serialize_documents(catalog.monasteries, SikkimMonastery)
     
-    for monastery in monasteries:
-        for festival in monastery.get('festivals', []):
-            festival_info = {
-                "name": festival['name'],
-                "date": festival['date'],
-                "description": festival['description'],
-                "significance": festival['significance'],
-                "monastery": monastery['name'],
-                "location": monastery['location']
-            }
-            all_festivals.append(festival_info)
+    upcoming_events = []
+    if events_limit:
+        today = datetime.now(timezone.utc).date()
+        upcoming_events = await find_occurrences(today, shift_to_year(today, today.year + 1), limit=events_limit)
     
-    return {"festivals": all_festivals}
+    return conditional_response(request, {
+        "monasteries": monasteries,
+        "facets": {
+            "districts": catalog.district_counts,
+            "traditions": catalog.tradition_counts
+        },
+        "upcoming_events": upcoming_events
+    }, "catalog")
 
 @api_router.get("/travel-guide")
-async def get_sikkim_travel_guide():
+async def get_sikkim_travel_guide(request: Request):
     """Get comprehensive travel guide for visiting Sikkim monasteries"""
+    return conditional_response(request, SIKKIM_TRAVEL_GUIDE, "static", TRAVEL_GUIDE_ETAG)
+
+# Itinerary planning
+# There is no road network in the catalog, so road distance is estimated as
+# great-circle distance times a circuity factor for Sikkim's hairpin roads,
+# driven at a typical hill-road speed.
+ROAD_CIRCUITY = float(os.environ.get('ROAD_CIRCUITY', '1.6'))
+ROAD_SPEED_KMH = float(os.environ.get('ROAD_SPEED_KMH', '25'))
+EXACT_ROUTE_LIMIT = int(os.environ.get('EXACT_ROUTE_LIMIT', '9'))
+DEFAULT_TRIP_START = {"lat": 27.3314, "lng": 88.6138}  # Gangtok, MG Marg
+DEFAULT_VISITING_HOURS = (6 * 60, 18 * 60)
+
+class TravelMatrix:
+    """Road distance and driving time between every pair of located monasteries"""
+
+    def __init__(self, geo_index: GeoIndex):
+        self.geo_index = geo_index
+        self.position = {monastery_id: i for i, monastery_id in enumerate(geo_index.ids)}
+        lats, lngs = geo_index.lats, geo_index.lngs
+        self.km = haversine_km(lats[:, None], lngs[:, None], lats[None, :], lngs[None, :]) * ROAD_CIRCUITY
+        self.minutes = self.km / ROAD_SPEED_KMH * 60
+
+    def from_point(self, lat: float, lng: float, positions: List[int]) -> tuple:
+        km = haversine_km(lat, lng, self.geo_index.lats[positions], self.geo_index.lngs[positions]) * ROAD_CIRCUITY
+        return km, km / ROAD_SPEED_KMH * 60
+
+def parse_clock(value: str) -> Optional[int]:
+    """Minutes after midnight for "14:30", "6:00 AM" or "6 PM"; None when unparsable"""
+    parsed = parse_visit_time(value)
+    return parsed[0] * 60 + parsed[1] if parsed else None
+
+def parse_visiting_hours(text: str) -> tuple:
+    """(opens, closes) in minutes after midnight; (None, None) for "Dawn to Dusk" or unparsable text"""
+    times = re.findall(r"\d{1,2}(?::\d{2})?\s*(?:[AaPp]\.?[Mm]\.?)?", text)
+    clocks = [parse_clock(t.replace(".", "")) for t in times]
+    if len(clocks) >= 2 and None not in clocks[:2] and clocks[0] < clocks[1]:
+        return clocks[0], clocks[1]
+    return None, None
+
+def format_clock(minutes: float) -> str:
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def exact_route(start: np.ndarray, between: np.ndarray) -> List[int]:
+    """Shortest open path from the start through every site (Held-Karp), as site indices"""
+    n = len(start)
+    full = (1 << n) - 1
+    cost = np.full((1 << n, n), np.inf)
+    parent = np.full((1 << n, n), -1, dtype=np.int64)
+    for j in range(n):
+        cost[1 << j, j] = start[j]
+    for mask in range(1, full):
+        row = cost[mask]
+        if not np.isfinite(row).any():
+            continue
+        extended = row[:, None] + between
+        best_from = extended.argmin(axis=0)
+        best = extended[best_from, np.arange(n)]
+        for j in range(n):
+            if mask & (1 << j):
+                continue
+            nxt = mask | (1 << j)
+            if best[j] < cost[nxt, j]:
+                cost[nxt, j] = best[j]
+                parent[nxt, j] = best_from[j]
+    last = int(cost[full].argmin())
+    route, mask = [], full
+    while last != -1:
+        route.append(last)
+        last, mask = int(parent[mask, last]), mask & ~(1 << last)
+    return route[::-1]
+
+def heuristic_route(start: np.ndarray, between: np.ndarray) -> List[int]:
+    """Nearest-neighbour open path from the start, improved with 2-opt"""
+    n = len(start)
+    route = [int(start.argmin())]
+    remaining = set(range(n)) - {route[0]}
+    while remaining:
+        here = route[-1]
+        nxt = min(remaining, key=lambda j: between[here, j])
+        route.append(nxt)
+        remaining.remove(nxt)
+
+    def leg(a: int, b: int) -> float:
+        return start[b] if a < 0 else between[a, b]
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            before = route[i - 1] if i else -1
+            for k in range(i + 1, n):
+                after = route[k + 1] if k + 1 < n else None
+                # Reversing route[i..k] swaps the legs into and out of the segment
+                old = leg(before, route[i]) + (between[route[k], after] if after is not None else 0)
+                new = leg(before, route[k]) + (between[route[i], after] if after is not None else 0)
+                if new < old - 1e-9:
+                    route[i:k + 1] = route[i:k + 1][::-1]
+                    improved = True
+    return route
+
+def schedule_route(route: List[str], catalog: "CatalogSnapshot", matrix: TravelMatrix, start: dict,
+                   trip_start: date, request: ItineraryRequest, day_start: int, day_end: int,
+                   event_days: Optional[Dict[str, List[int]]] = None) -> tuple:
+    """Split an ordered route into days around visiting hours; sites that do not fit are returned unscheduled
+
+    A site with an event on a later trip day (event_days, ascending day
+    indexes) is held back and visited first thing that day instead.
+    """
+    days = [{"day": d + 1, "date": (trip_start + timedelta(days=d)).isoformat(), "stops": [], "travel_km": 0.0}
+            for d in range(request.days)]
+    unscheduled = []
+    event_days = event_days or {}
+    day, clock, here = 0, day_start, None
+
+    def place(monastery_id: str):
+        nonlocal day, clock, here
+        monastery = catalog.by_id[monastery_id]
+        opens, closes = monastery.get('opens_minute'), monastery.get('closes_minute')
+        if opens is None or closes is None:
+            # Hours like "Dawn to Dusk" are unknown to filters; plan around daylight
+            opens, closes = DEFAULT_VISITING_HOURS
+        position = matrix.position[monastery_id]
+        placed = False
+        while day < request.days and not placed:
+            if here is None:
+                km, minutes = (float(v[0]) for v in matrix.from_point(start['lat'], start['lng'], [position]))
+            else:
+                km, minutes = float(matrix.km[here, position]), float(matrix.minutes[here, position])
+            arrive = clock + minutes
+            begin = max(arrive, opens)
+            if begin + request.visit_minutes <= min(closes, day_end):
+                days[day]["stops"].append({
+                    "monastery": project_document(monastery, MONASTERY_SUMMARY_FIELDS),
+                    "travel_km": round(km, 1),
+                    "travel_minutes": round(minutes),
+                    "arrive": format_clock(arrive),
+                    "visit_start": format_clock(begin),
+                    "visit_end": format_clock(begin + request.visit_minutes)
+                })
+                days[day]["travel_km"] += km
+                clock, here, placed = begin + request.visit_minutes, position, True
+            elif clock == day_start:
+                # Even a fresh day cannot fit this visit
+                break
+            else:
+                # Stay the night where we are and continue next morning
+                day, clock = day + 1, day_start
+        if not placed:
+            unscheduled.append(monastery_id)
+
+    held: List[tuple] = []  # (event day, monastery id)
+    for monastery_id in route:
+        target = next((d for d in event_days.get(monastery_id, []) if d >= day), None)
+        if target is not None and target > day:
+            held.append((target, monastery_id))
+            continue
+        for due in sorted(h for h in held if h[0] <= day):
+            held.remove(due)
+            place(due[1])
+        place(monastery_id)
+    for target, monastery_id in sorted(held):
+        if target > day:
+            day, clock = target, day_start
+        place(monastery_id)
+    for plan in days:
+        plan["travel_km"] = round(plan["travel_km"], 1)
+    return days, unscheduled
+
+@api_router.post("/itineraries/plan")
+async def plan_itinerary(request: ItineraryRequest):
+    """Order chosen monasteries into a multi-day trip minimizing driving time
+
+    Routes of up to EXACT_ROUTE_LIMIT monasteries are solved exactly, longer
+    ones with nearest neighbour and 2-opt. Days are split around each
+    monastery's visiting hours. A monastery with a cultural event later in the
+    trip waits for the event's first day; events on the visit day are attached
+    to the stop and the rest are listed as missed.
+    """
+    started = time.perf_counter()
+    try:
+        trip_start = date.fromisoformat(request.start_date)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="start_date must be YYYY-MM-DD")
+    day_start, day_end = parse_clock(request.day_start), parse_clock(request.day_end)
+    if day_start is None or day_end is None or day_start >= day_end:
+        raise HTTPException(status_code=422, detail="day_start and day_end must be times with day_start first")
+    start = request.start or DEFAULT_TRIP_START
+    if not valid_coordinates(start):
+        raise HTTPException(status_code=422, detail="start must have lat and lng")
+    
+    catalog = await catalog_cache.get()
+    monastery_ids = list(dict.fromkeys(request.monastery_ids))
+    missing = [m for m in monastery_ids if m not in catalog.by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Monasteries not found: {', '.join(missing)}")
+    matrix = catalog.travel_matrix()
+    unlocated = [m for m in monastery_ids if m not in matrix.position]
+    routable = [m for m in monastery_ids if m in matrix.position]
+    
+    route: List[str] = []
+    if routable:
+        positions = [matrix.position[m] for m in routable]
+        _, from_start = matrix.from_point(start['lat'], start['lng'], positions)
+        between = matrix.minutes[np.ix_(positions, positions)]
+        solve = exact_route if len(routable) <= EXACT_ROUTE_LIMIT else heuristic_route
+        route = [routable[i] for i in solve(from_start, between)]
+    
+    trip_end = trip_start + timedelta(days=request.days - 1)
+    events = defaultdict(list)
+    for occurrence in await find_occurrences(trip_start, trip_end):
+        if occurrence.get('monastery_id') in catalog.by_id:
+            events[occurrence['monastery_id']].append(occurrence)
+    event_days = {
+        m: [d for d in range(request.days)
+            if any(o['start_date'] <= (trip_start + timedelta(days=d)).isoformat() <= o['end_date'] for o in events[m])]
+        for m in route if events[m]
+    }
+    days, unscheduled = schedule_route(route, catalog, matrix, start, trip_start, request, day_start, day_end, event_days)
+    for plan in days:
+        for stop in plan["stops"]:
+            stop["events"] = [
+                {"id": o['event_id'], "title": o['title'], "start_date": o['start_date'], "end_date": o['end_date']}
+                for o in events[stop["monastery"]["id"]] if o['start_date'] <= plan["date"] <= o['end_date']
+            ]
+    missed_events = [
+        {"id": o['event_id'], "title": o['title'], "monastery_id": m, "start_date": o['start_date'], "end_date": o['end_date']}
+        for m in monastery_ids for o in events[m]
+        if not any(stop["monastery"]["id"] == m and o['start_date'] <= plan["date"] <= o['end_date']
+                   for plan in days for stop in plan["stops"])
+    ]
+    
     return {
-        "permits": {
-            "inner_line_permit": "Required for non-Indians visiting most areas",
-            "how_to_get": "Online application or at checkpoints",
-            "duration": "15-30 days",
-            "documents": "Valid ID proof, passport photos"
-        },
-        "best_time": {
-            "peak_season": "March to June, September to December",
-            "monsoon": "July-August (avoid due to landslides)",
-            "winter": "December-February (cold but clear views)",
-            "festival_time": "February-March for major festivals"
-        },
-        "getting_there": {
-            "nearest_airport": "Bagdogra Airport (West Bengal)",
-            "nearest_railway": "New Jalpaiguri (NJP)",
-            "road_access": "NH10 from West Bengal",
-            "local_transport": "Shared jeeps, private taxis, government buses"
-        },
-        "accommodation": {
-            "types": ["Luxury hotels", "Budget hotels", "Guest houses", "Homestays"],
-            "booking_tips": "Book in advance during peak season",
-            "monastery_stays": "Some monasteries offer basic accommodation"
-        },
-        "important_tips": [
-            "Carry warm clothes even in summer",
-            "Respect photography restrictions in monasteries",
-            "Remove shoes before entering prayer halls",
-            "Don't point feet towards Buddha statues",
-            "Carry cash as ATMs are limited in remote areas",
-            "Stay hydrated at high altitudes"
-        ]
+        "days": days,
+        "unscheduled": unscheduled + unlocated,
+        "missed_events": missed_events,
+        "total_travel_km": round(sum(plan["travel_km"] for plan in days), 1),
+        "solver": "exact" if len(routable) <= EXACT_ROUTE_LIMIT else "heuristic",
+        "took_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+# Recurring event occurrences
+# Festivals on the Tibetan lunar calendar move every year, so their dates come
+# from per-year tables (extend them as each year's calendar is published);
+# years past a table reuse its latest month and day, flagged approximate.
+# Other recurring events keep their month and day. Occurrences are
+# materialized once per year into event_occurrences, tagged with every month
+# they touch, so calendar queries are a single index range scan.
+LUNAR_FESTIVAL_DATES = {
+    "losar": {
+        2024: ("2024-02-10", "2024-02-12"),
+        2025: ("2025-02-28", "2025-03-02"),
+        2026: ("2026-02-18", "2026-02-20")
+    },
+    "saga_dawa": {
+        2024: ("2024-05-23", "2024-06-22"),
+        2025: ("2025-05-28", "2025-06-25"),
+        2026: ("2026-05-17", "2026-06-15")
+    },
+    "drukpa_tsheshi": {
+        2024: ("2024-07-21", "2024-07-21"),
+        2025: ("2025-07-28", "2025-07-28"),
+        2026: ("2026-07-18", "2026-07-18")
+    },
+    "pang_lhabsol": {
+        2024: ("2024-09-04", "2024-09-04"),
+        2025: ("2025-09-06", "2025-09-06"),
+        2026: ("2026-08-27", "2026-08-27")
+    }
+}
+
+# Years materialized from an older table are expanded again
+LUNAR_FESTIVAL_FINGERPRINT = hashlib.sha1(json.dumps(LUNAR_FESTIVAL_DATES, sort_keys=True).encode()).hexdigest()
+
+def shift_to_year(day: date, year: int) -> date:
+    try:
+        return day.replace(year=year)
+    except ValueError:
+        return day.replace(year=year, day=28)  # 29 February in a non-leap year
+
+def months_between(start: date, end: date) -> List[str]:
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def expand_event(event: dict, year: int) -> Optional[dict]:
+    """The event's occurrence starting in the given year, if it has one"""
+    start = date.fromisoformat(event['start_date'])
+    end = date.fromisoformat(event['end_date'])
+    approximate = False
+    if not event.get('is_recurring'):
+        if start.year != year:
+            return None
+    else:
+        known = LUNAR_FESTIVAL_DATES.get(event.get('lunar_festival') or "", {})
+        if year in known:
+            start, end = (date.fromisoformat(d) for d in known[year])
+        else:
+            if known:
+                start, end = (date.fromisoformat(d) for d in known[max(known)])
+            approximate = bool(event.get('lunar_festival'))
+            duration = end - start
+            start = shift_to_year(start, year)
+            end = start + duration
+    return {
+        **event,
+        "_id": f"{event['id']}:{year}",
+        "event_id": event['id'],
+        "year": year,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "months": months_between(start, end),
+        "approximate": approximate
+    }
+
+async def ensure_occurrences(years: List[int]):
+    """Materialize occurrences for any of the years not yet expanded from the current events"""
+    # Read before the events, so a write landing mid-expansion leaves this
+    # marker behind its version and the year is expanded again
+    version = (await get_data_version("cultural_events"))["version"]
+    done = {marker["_id"] async for marker in db.occurrence_years.find(
+        {"_id": {"$in": years}, "lunar_dates": LUNAR_FESTIVAL_FINGERPRINT, "events_version": version})}
+    missing = [year for year in years if year not in done]
+    if not missing:
+        return
+    events = await db.cultural_events.find({}, model_projection(CulturalEvent)).to_list(length=None)
+    for year in missing:
+        occurrences = []
+        for event in events:
+            try:
+                occurrence = expand_event(event, year)
+            except ValueError as e:
+                # A row stored before dates were validated must not take the calendar down
+                logger.warning(f"Skipping cultural event {event['id']} with unparsable dates: {e}")
+                continue
+            if occurrence:
+                occurrences.append(occurrence)
+        if occurrences:
+            await db.event_occurrences.bulk_write([ReplaceOne({"_id": o["_id"]}, o, upsert=True) for o in occurrences], ordered=False)
+        await db.event_occurrences.delete_many({"year": year, "_id": {"$nin": [o["_id"] for o in occurrences]}})
+        await db.occurrence_years.update_one(
+            {"_id": year},
+            {"$set": {"materialized_at": datetime.now(timezone.utc), "occurrences": len(occurrences),
+                      "lunar_dates": LUNAR_FESTIVAL_FINGERPRINT, "events_version": version}},
+            upsert=True
+        )
+        logger.info(f"Materialized {len(occurrences)} cultural event occurrences for {year}")
+
+async def find_occurrences(start: date, end: date, limit: Optional[int] = None) -> List[dict]:
+    """Occurrences overlapping [start, end], ordered by start date"""
+    # An occurrence starting the previous year can run into this range
+    await ensure_occurrences(list(range(start.year - 1, end.year + 1)))
+    query = {
+        "months": {"$in": months_between(start, end)},
+        "start_date": {"$lte": end.isoformat()},
+        "end_date": {"$gte": start.isoformat()}
     }
+    cursor = db.event_occurrences.find(query, {"_id": 0, "months": 0}).sort("start_date", 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list(length=None)
 
 @api_router.post("/cultural-events/initialize")
-async def initialize_cultural_events(force: bool = False):
-    """Initialize the database with cultural events data"""
+async def initialize_cultural_events(force: bool = False, dry_run: bool = False):
+    """Initialize the database with cultural events data
+
+    With force=True existing data is synced in place rather than replaced.
+    """
     try:
         # Check if events already exist
         existing_count = await db.cultural_events.count_documents({})
         if existing_count > 0 and not force:
             return {"message": f"Database already contains {existing_count} cultural events"}
         
-        # Clear existing data if force=True
-        if force:
-            await db.cultural_events.delete_many({})
-        
-        # Get monastery IDs for linking events
-        monasteries = await db.sikkim_monasteries.find().to_list(length=None)
-        monastery_map = {m['name']: m['id'] for m in monasteries}
-        
-        # Insert cultural events data
-        events = []
-        for data in cultural_events_data:
-            # Set monastery_id if monastery_name exists
-            if data.get('monastery_name') and data['monastery_name'] in monastery_map:
-                data['monastery_id'] = monastery_map[data['monastery_name']]
-            
-            event = CulturalEvent(**data)
-            events.append(event.dict())
-        
-        result = await db.cultural_events.insert_many(events)
-        return {"message": f"Successfully initialized {len(result.inserted_ids)} cultural events"}
+        monastery_ids = {m['name']: m['id'] async for m in db.sikkim_monasteries.find({}, {"_id": 0, "name": 1, "id": 1})}
+        async with catalog_sync_lock:
+            result = await sync_cultural_events(monastery_ids, dry_run)
+        summary = sync_summary(result["changes"])
+        return {
+            "message": f"{'Would sync' if dry_run else 'Synced'} cultural events: {summary['created']} created, "
+                       f"{summary['updated']} updated, {summary['unchanged']} unchanged",
+            "dry_run": dry_run,
+            **result["changes"]
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/cultural-events", response_model=List[CulturalEvent])
 async def get_cultural_events(
+    request: Request,
     start_date: Optional[str] = Query(None, description="Filter events after this date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="Filter events before this date (YYYY-MM-DD)"),
     event_type: Optional[str] = Query(None, description="Filter by event type"),
@@ -966,8 +2796,183 @@ async def get_cultural_events(
     if tradition:
         query["traditions"] = {"$in": [tradition]}
     
-    events = await db.cultural_events.find(query).sort("start_date", 1).to_list(length=None)
-    return [CulturalEvent(**event) for event in events]
+    events = await db.cultural_events.find(query, model_projection(CulturalEvent)).sort("start_date", 1).to_list(length=None)
+    return conditional_response(request, serialize_documents(events, CulturalEvent), "calendar")
+
+EVENT_FACETS = ("event_type", "traditions", "monastery", "month")
+
+class EventFacetIndex:
+    """Cultural events held in memory with a boolean mask per facet value
+
+    Built for one cultural_events data version; counting a facet is a mask
+    intersection, so a page plus every facet's counts costs one pass. Dates
+    and the month facet come from each query's occurrences, since recurring
+    events move from year to year.
+    """
+
+    def __init__(self, events: List[dict], version: int):
+        self.version = version
+        self.events = sorted(events, key=lambda e: e['id'])
+        self.position = {e['id']: i for i, e in enumerate(self.events)}
+        self.masks: Dict[str, Dict] = {facet: {} for facet in EVENT_FACETS if facet != "month"}
+        self.monastery_names: Dict[str, str] = {}
+        for i, event in enumerate(self.events):
+            self._mark("event_type", event['event_type'], i)
+            for tradition in event['traditions']:
+                self._mark("traditions", tradition, i)
+            if event.get('monastery_id'):
+                self._mark("monastery", event['monastery_id'], i)
+                self.monastery_names[event['monastery_id']] = event.get('monastery_name') or event['location']
+        self.text_index = RetrievalIndex()
+        for event in self.events:
+            self.text_index.upsert(event['id'], [(event['title'], f"{event['description']} {' '.join(event['activities'])}")])
+
+    def _mark(self, facet: str, value, i: int, masks: Optional[Dict] = None):
+        masks = self.masks[facet] if masks is None else masks
+        mask = masks.get(value)
+        if mask is None:
+            mask = masks[value] = np.zeros(len(self.events), dtype=bool)
+        mask[i] = True
+
+    def query(self, filters: dict, occurrences: List[dict], window: tuple,
+              q: Optional[str] = None, limit: int = 20, offset: int = 0) -> dict:
+        """Search the events with an occurrence in window, shown with its dates
+
+        occurrences are find_occurrences(*window); an event recurring twice
+        in the window is listed once, at its first occurrence.
+        """
+        n = len(self.events)
+        base = np.zeros(n, dtype=bool)
+        shown: List[Optional[dict]] = [None] * n
+        months: Dict[int, np.ndarray] = {}
+        for occurrence in occurrences:
+            i = self.position.get(occurrence['event_id'])
+            if i is None:
+                continue
+            base[i] = True
+            if shown[i] is None:
+                shown[i] = occurrence
+            start = max(date.fromisoformat(occurrence['start_date']), window[0])
+            end = min(date.fromisoformat(occurrence['end_date']), window[1])
+            for month in months_between(start, end):
+                self._mark("month", int(month[5:]), i, months)
+        masks = {**self.masks, "month": months}
+        scores = None
+        if q:
+            matched = np.zeros(n, dtype=bool)
+            scores = np.zeros(n)
+            for r in self.text_index.search(q, k=max(n, 1), prefix=True):
+                i = self.position[r['source']]
+                matched[i] = True
+                scores[i] = r['score']
+            base &= matched
+        selected = {facet: masks[facet].get(value, np.zeros(n, dtype=bool))
+                    for facet, value in filters.items() if value is not None}
+        
+        def narrowed(exclude: Optional[str] = None) -> np.ndarray:
+            mask = base.copy()
+            for facet, facet_mask in selected.items():
+                if facet != exclude:
+                    mask &= facet_mask
+            return mask
+        
+        # Each facet is counted with every filter but its own, so the UI can
+        # show how many results picking another value would give
+        facets = {}
+        for facet in EVENT_FACETS:
+            mask = narrowed(facet)
+            counts = []
+            for value, facet_mask in sorted(masks[facet].items()):
+                count = int(np.count_nonzero(facet_mask & mask))
+                if count or filters.get(facet) == value:
+                    entry = {"value": value, "count": count}
+                    if facet == "monastery":
+                        entry["label"] = self.monastery_names[value]
+                    counts.append(entry)
+            facets[facet] = counts
+        
+        positions = sorted(np.flatnonzero(narrowed()), key=lambda i: (shown[i]['start_date'], self.events[i]['id']))
+        if scores is not None:
+            positions = sorted(positions, key=lambda i: -scores[i])
+        page = positions[offset:offset + limit]
+        return {
+            "total": len(positions),
+            "events": [{**self.events[i], "start_date": shown[i]['start_date'], "end_date": shown[i]['end_date']}
+                       for i in page],
+            "facets": facets
+        }
+
+event_facet_index: Optional[EventFacetIndex] = None
+
+async def get_event_facet_index() -> EventFacetIndex:
+    """The facet index for the current cultural_events data version, rebuilt after any write"""
+    global event_facet_index
+    version = (await get_data_version("cultural_events"))["version"]
+    if event_facet_index is None or event_facet_index.version != version:
+        events = await db.cultural_events.find({}, model_projection(CulturalEvent)).to_list(length=None)
+        event_facet_index = EventFacetIndex(events, version)
+    return event_facet_index
+
+@api_router.get("/cultural-events/search")
+async def search_cultural_events(
+    request: Request,
+    q: Optional[str] = Query(None, description="Search text over title, description and activities"),
+    event_type: Optional[str] = Query(None, description="Filter by event type"),
+    tradition: Optional[str] = Query(None, description="Filter by Buddhist tradition"),
+    monastery_id: Optional[str] = Query(None, description="Filter by monastery"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Events running in this month"),
+    year: Optional[int] = Query(None, ge=1, le=9999, description="Year to search when no dates are given (default: this year)"),
+    start_date: Optional[date] = Query(None, description="Events running on or after this date (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Events running on or before this date (YYYY-MM-DD)"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """A page of cultural events plus counts per event type, tradition, monastery and month
+
+    Events are matched by their occurrences in the date range, which defaults
+    to the rest of the calendar year of whichever bound is given, and are
+    returned with that occurrence's dates.
+    """
+    year = year or (start_date or end_date or datetime.now(timezone.utc).date()).year
+    window = (start_date or date(year, 1, 1), end_date or date(year, 12, 31))
+    if window[1] < window[0]:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (window[1] - window[0]).days > 366:
+        raise HTTPException(status_code=400, detail="Date range is limited to one year")
+    index = await get_event_facet_index()
+    etag = make_etag("cultural-events-search", index.version, window[0].isoformat(), window[1].isoformat(), request.url.query)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, "calendar")
+    result = index.query(
+        {"event_type": event_type, "traditions": tradition, "monastery": monastery_id, "month": month},
+        await find_occurrences(*window), window, q=q, limit=limit, offset=offset
+    )
+    return conditional_response(request, {
+        "query": q,
+        "total": result["total"],
+        "limit": limit,
+        "offset": offset,
+        "events": serialize_documents(result["events"], CulturalEvent),
+        "facets": result["facets"]
+    }, "calendar", etag)
+
+@api_router.get("/cultural-events/occurrences")
+async def get_event_occurrences(
+    request: Request,
+    start_date: date = Query(..., description="First day of the range (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="Last day of the range (YYYY-MM-DD)")
+):
+    """Get cultural event occurrences overlapping a date range, such as a week"""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days > 366:
+        raise HTTPException(status_code=400, detail="Date range is limited to one year")
+    events = await find_occurrences(start_date, end_date)
+    return conditional_response(request, {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "events": events
+    }, "calendar")
 
 @api_router.get("/cultural-events/{event_id}", response_model=CulturalEvent)
 async def get_cultural_event(event_id: str):
@@ -981,46 +2986,368 @@ async def get_cultural_event(event_id: str):
 async def create_cultural_event(event: CulturalEventCreate):
     """Create a new cultural event"""
     new_event = CulturalEvent(**event.dict())
-    await db.cultural_events.insert_one(new_event.dict())
+    try:
+        await db.cultural_events.insert_one(new_event.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"A cultural event titled {event.title} already exists")
+    await bump_data_version("cultural_events")
+    index_cultural_event(new_event.dict())
     return new_event
 
 @api_router.get("/cultural-events/calendar/{year}/{month}")
-async def get_monthly_events(year: int, month: int):
-    """Get cultural events for a specific month"""
-    # Create date range for the month
-    start_date = f"{year:04d}-{month:02d}-01"
-    if month == 12:
-        end_date = f"{year+1:04d}-01-01"
+async def get_monthly_events(
+    request: Request,
+    year: int = PathParam(..., ge=1900, le=2200),
+    month: int = PathParam(..., ge=1, le=12)
+):
+    """Get cultural event occurrences for a specific month, recurring events included"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    events = await find_occurrences(start, end - timedelta(days=1))
+    return conditional_response(request, {
+        "year": year,
+        "month": month,
+        "events": events
+    }, "calendar")
+
+# iCalendar feeds
+ICS_PRODID = "-//Sikkim Monasteries//Virtual Heritage Tours//EN"
+ICS_TIMEZONE = "Asia/Kolkata"
+ics_cache = TTLCache(int(os.environ.get('ICS_CACHE_SIZE', '256')), float(os.environ.get('ICS_CACHE_TTL', '86400')))
+
+def ics_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def ics_lines(*lines: str) -> bytes:
+    """Encode content lines, folded at 75 octets as RFC 5545 requires"""
+    out = []
+    for line in lines:
+        data = line.encode()
+        while len(data) > 75:
+            cut = 75
+            # Do not split a multi-byte UTF-8 character
+            while cut and (data[cut] & 0xC0) == 0x80:
+                cut -= 1
+            out.append(data[:cut])
+            data = b" " + data[cut:]
+        out.append(data)
+    return b"".join(chunk + b"\r\n" for chunk in out)
+
+def ics_header(name: str) -> bytes:
+    return ics_lines(
+        "BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{ICS_PRODID}", "CALSCALE:GREGORIAN", "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{ics_escape(name)}", f"X-WR-TIMEZONE:{ICS_TIMEZONE}",
+        "BEGIN:VTIMEZONE", f"TZID:{ICS_TIMEZONE}", "BEGIN:STANDARD", "DTSTART:19700101T000000",
+        "TZOFFSETFROM:+0530", "TZOFFSETTO:+0530", "TZNAME:IST", "END:STANDARD", "END:VTIMEZONE"
+    )
+
+def ics_stamp(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def occurrence_vevent(occurrence: dict, stamp: str) -> bytes:
+    start = date.fromisoformat(occurrence['start_date'])
+    end = date.fromisoformat(occurrence['end_date']) + timedelta(days=1)  # DTEND is exclusive
+    description = f"{occurrence['description']}\n\n{occurrence['visitor_info']}"
+    return ics_lines(
+        "BEGIN:VEVENT",
+        f"UID:{occurrence['event_id']}-{occurrence['year']}@sikkim-monasteries",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;VALUE=DATE:{start:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{end:%Y%m%d}",
+        f"SUMMARY:{ics_escape(occurrence['title'])}",
+        f"DESCRIPTION:{ics_escape(description)}",
+        f"LOCATION:{ics_escape(occurrence['location'])}",
+        f"CATEGORIES:{','.join(ics_escape(t) for t in [occurrence['event_type'], *occurrence['traditions']])}",
+        "TRANSP:TRANSPARENT",
+        "END:VEVENT"
+    )
+
+def booking_vevent(booking: dict, monastery_name: str, stamp: str) -> bytes:
+    try:
+        visit = date.fromisoformat(booking['visit_date'])
+    except ValueError:
+        # Free-text visit dates predate validation; they cannot be placed on a calendar
+        return b""
+    time_of_day = parse_visit_time(booking['visit_time'])
+    if time_of_day:
+        start = datetime(visit.year, visit.month, visit.day, *time_of_day)
+        timing = (f"DTSTART;TZID={ICS_TIMEZONE}:{start:%Y%m%dT%H%M%S}",
+                  f"DTEND;TZID={ICS_TIMEZONE}:{start + timedelta(hours=2):%Y%m%dT%H%M%S}")
     else:
-        end_date = f"{year:04d}-{month+1:02d}-01"
+        timing = (f"DTSTART;VALUE=DATE:{visit:%Y%m%d}", f"DTEND;VALUE=DATE:{visit + timedelta(days=1):%Y%m%d}")
+    tour = booking['tour_type'].replace('_', ' ')
+    description = f"Booking {booking['id']} for {booking['group_size']} visitor(s)"
+    if booking.get('special_requests'):
+        description += f"\nSpecial requests: {booking['special_requests']}"
+    return ics_lines(
+        "BEGIN:VEVENT",
+        f"UID:{booking['id']}@sikkim-monasteries",
+        f"DTSTAMP:{stamp}",
+        *timing,
+        f"SUMMARY:{ics_escape(monastery_name + ' - ' + tour)}",
+        f"DESCRIPTION:{ics_escape(description)}",
+        f"STATUS:{'CANCELLED' if booking['booking_status'] == 'cancelled' else 'CONFIRMED'}",
+        "END:VEVENT"
+    )
+
+def ics_response(request: Request, etag: str, filename: str, render) -> Response:
+    """Serve a feed from the rendered-body cache, or stream it and cache the result
+
+    Answers 304 when the subscriber already has this version.
+    """
+    headers = {**caching_headers(etag, "calendar"), "Content-Disposition": f'inline; filename="{filename}"'}
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, "calendar")
+    cached = ics_cache.get(etag)
+    if cached is not None:
+        return Response(cached, media_type="text/calendar; charset=utf-8", headers=headers)
     
-    query = {
-        "$or": [
-            {"start_date": {"$gte": start_date, "$lt": end_date}},
-            {"end_date": {"$gte": start_date, "$lt": end_date}},
-            {"$and": [
-                {"start_date": {"$lt": start_date}},
-                {"end_date": {"$gte": end_date}}
-            ]}
-        ]
-    }
+    async def stream():
+        parts = []
+        async for chunk in render():
+            parts.append(chunk)
+            yield chunk
+        ics_cache.set(etag, b"".join(parts))
     
-    events = await db.cultural_events.find(query).sort("start_date", 1).to_list(length=None)
+    return StreamingResponse(stream(), media_type="text/calendar; charset=utf-8", headers=headers)
+
+@api_router.get("/calendar/events.ics")
+async def get_events_ics(
+    request: Request,
+    monastery_id: Optional[str] = Query(None, description="Only events at this monastery"),
+    tradition: Optional[str] = Query(None, description="Only events of this Buddhist tradition"),
+    year: Optional[int] = Query(None, ge=1900, le=2200, description="Only this year; defaults to this year and next")
+):
+    """iCalendar feed of cultural event occurrences, for all events, one monastery or one tradition"""
+    version = await get_data_version("cultural_events")
+    this_year = datetime.now(timezone.utc).year
+    years = [year] if year else [this_year, this_year + 1]
+    etag = make_etag("events.ics", version["version"], years, monastery_id, tradition)
+    
+    async def render():
+        await ensure_occurrences(years)
+        query = {"year": {"$in": years}}
+        if monastery_id:
+            query["monastery_id"] = monastery_id
+        if tradition:
+            query["traditions"] = tradition
+        stamp = ics_stamp(version["updated_at"])
+        yield ics_header("Sikkim Monastery Festivals")
+        async for occurrence in db.event_occurrences.find(query, {"_id": 0, "months": 0}).sort("start_date", 1):
+            yield occurrence_vevent(occurrence, stamp)
+        yield ics_lines("END:VCALENDAR")
+    
+    return ics_response(request, etag, "sikkim-festivals.ics", render)
+
+@api_router.get("/calendar/bookings/{email}.ics")
+async def get_bookings_ics(email: str, request: Request):
+    """iCalendar feed of a visitor's monastery bookings
+
+    The ETag covers only this visitor's bookings and their statuses (the
+    only field that changes after booking), so other visitors' bookings do
+    not invalidate subscribers' copies.
+    """
+    catalog = await catalog_cache.get()
+    states = await db.bookings.find(
+        {"visitor_email": email}, {"_id": 0, "id": 1, "booking_status": 1, "created_at": 1}
+    ).sort([("created_at", -1), ("id", -1)]).to_list(length=None)
+    digest = hashlib.sha1("|".join(f"{b['id']}:{b['booking_status']}" for b in states).encode()).hexdigest()
+    etag = make_etag("bookings.ics", email, digest, catalog.fingerprint)
+    
+    async def render():
+        stamp = ics_stamp(states[0]["created_at"] if states else datetime(2024, 1, 1, tzinfo=timezone.utc))
+        yield ics_header("My Sikkim Monastery Visits")
+        async for booking in db.bookings.find({"visitor_email": email}, model_projection(Booking)).sort("created_at", -1):
+            monastery = catalog.by_id.get(booking['monastery_id'])
+            yield booking_vevent(booking, monastery['name'] if monastery else "Monastery visit", stamp)
+        yield ics_lines("END:VCALENDAR")
+    
+    return ics_response(request, etag, "my-monastery-visits.ics", render)
+
+# Database indexes
+# Declared per collection and created idempotently at startup. Every query
+# shape the API issues is listed in QUERY_SHAPES so boot can warn about any
+# that no index serves.
+INDEX_SPECS = {
+    "sikkim_monasteries": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Natural key of catalog sync; unique so concurrent syncs cannot both insert
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True)
+    ],
+    "bookings": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # id breaks created_at ties in the admin list's keyset sort; visit_date
+        # follows the sort keys so date-range filters are checked in the index
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING), ("visit_date", ASCENDING)],
+                   name="created_at_id_visit_date"),
+        IndexModel([("visitor_email", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="visitor_email_created_at_id"),
+        IndexModel([("monastery_id", ASCENDING), ("visit_date", ASCENDING)], name="monastery_id_visit_date"),
+        IndexModel([("monastery_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING), ("visit_date", ASCENDING)],
+                   name="monastery_id_created_at_id_visit_date"),
+        IndexModel([("booking_status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="booking_status_created_at_id"),
+        IndexModel([("tour_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="tour_type_created_at_id")
+    ],
+    "chat_messages": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("session_id", ASCENDING), ("timestamp", DESCENDING)], name="session_id_timestamp")
+    ],
+    "cultural_events": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("start_date", ASCENDING), ("end_date", ASCENDING)], name="start_date_end_date"),
+        IndexModel([("end_date", ASCENDING), ("start_date", ASCENDING)], name="end_date_start_date"),
+        IndexModel([("event_type", ASCENDING), ("start_date", ASCENDING)], name="event_type_start_date"),
+        IndexModel([("monastery_id", ASCENDING), ("start_date", ASCENDING)], name="monastery_id_start_date"),
+        IndexModel([("traditions", ASCENDING), ("start_date", ASCENDING)], name="traditions_start_date"),
+        IndexModel([("title", ASCENDING)], name="title_unique", unique=True)
+    ],
+    "event_occurrences": [
+        IndexModel([("months", ASCENDING), ("start_date", ASCENDING)], name="months_start_date"),
+        IndexModel([("year", ASCENDING), ("start_date", ASCENDING)], name="year_start_date")
+    ],
+    "booking_slots": [
+        IndexModel([("monastery_id", ASCENDING), ("visit_date", ASCENDING), ("visit_time", ASCENDING), ("tour_type", ASCENDING)],
+                   name="slot_unique", unique=True)
+    ],
+    "status_checks": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+    ],
+    "idempotency_keys": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=IDEMPOTENCY_TTL)
+    ]
+}
+
+# Indexes replaced by wider ones; dropped at startup so writes stop maintaining them
+RETIRED_INDEXES = {
+    "sikkim_monasteries": ["name"],
+    "cultural_events": ["title"],
+    "bookings": ["created_at", "visitor_email_created_at", "monastery_id_created_at",
+                 "booking_status_created_at", "tour_type_created_at"]
+}
+
+# (collection, equality-filtered fields, sort fields[, range-filtered fields])
+# for each query the endpoints run
+QUERY_SHAPES = [
+    ("sikkim_monasteries", ["id"], []),
+    ("sikkim_monasteries", ["name"], []),
+    ("bookings", ["id"], []),
+    ("bookings", [], ["created_at", "id"]),
+    ("bookings", [], ["created_at", "id"], ["visit_date"]),
+    ("bookings", ["visitor_email"], ["created_at", "id"]),
+    ("bookings", ["monastery_id"], ["created_at", "id"]),
+    ("bookings", ["monastery_id"], ["created_at", "id"], ["visit_date"]),
+    ("bookings", ["booking_status"], ["created_at", "id"]),
+    ("bookings", ["tour_type"], ["created_at", "id"]),
+    ("bookings", ["monastery_id", "visit_date"], []),
+    ("event_occurrences", ["months"], ["start_date"]),
+    ("event_occurrences", ["year"], ["start_date"]),
+    ("booking_slots", ["monastery_id", "visit_date", "visit_time", "tour_type"], []),
+    ("booking_slots", ["monastery_id", "visit_date"], ["visit_date", "visit_time"]),
+    ("chat_messages", ["session_id"], ["timestamp"]),
+    ("cultural_events", ["id"], []),
+    ("cultural_events", ["start_date"], ["start_date"]),
+    ("cultural_events", ["end_date"], ["start_date"]),
+    ("cultural_events", ["event_type"], ["start_date"]),
+    ("cultural_events", ["monastery_id"], ["start_date"]),
+    ("cultural_events", ["traditions"], ["start_date"]),
+    ("cultural_events", ["title"], [])
+]
+
+index_report: Dict[str, dict] = {}
+
+def index_serves(keys: List[str], filter_fields: List[str], sort_fields: List[str],
+                 range_fields: List[str] = ()) -> bool:
+    """Whether an index's keys are the equality fields, then the sort fields, then any range fields"""
+    prefix = len(filter_fields)
+    if set(keys[:prefix]) != set(filter_fields):
+        return False
+    sort = [field for field in sort_fields if field not in filter_fields]
+    if keys[prefix:prefix + len(sort)] != sort:
+        return False
+    after_sort = prefix + len(sort)
+    return set(range_fields) <= set(keys[after_sort:after_sort + len(range_fields)])
+
+def unindexed_query_shapes() -> List[tuple]:
+    scans = []
+    for collection, filter_fields, sort_fields, *ranges in QUERY_SHAPES:
+        range_fields = ranges[0] if ranges else []
+        indexes = [list(model.document["key"].keys()) for model in INDEX_SPECS.get(collection, [])]
+        if not any(index_serves(keys, filter_fields, sort_fields, range_fields) for keys in indexes):
+            scans.append((collection, filter_fields, sort_fields, range_fields))
+    return scans
+
+async def ensure_indexes() -> Dict[str, dict]:
+    """Create any declared index that does not exist yet and report what was built"""
+    for collection, models in INDEX_SPECS.items():
+        existing = await db[collection].index_information()
+        for name in RETIRED_INDEXES.get(collection, []):
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info(f"Dropped retired index {name} on {collection}")
+        missing = [model for model in models if model.document["name"] not in existing]
+        created = []
+        if missing:
+            started = time.perf_counter()
+            try:
+                created = await db[collection].create_indexes(missing)
+                logger.info(f"Built {len(created)} index(es) on {collection} in {time.perf_counter() - started:.2f}s: {', '.join(created)}")
+            except OperationFailure as e:
+                # Typically duplicate natural keys blocking a unique index; other collections still get theirs
+                logger.error(f"Failed to build indexes on {collection}: {e}")
+        index_report[collection] = {
+            "declared": [model.document["name"] for model in models],
+            "created": created
+        }
+    for collection, filter_fields, sort_fields, range_fields in unindexed_query_shapes():
+        logger.warning(f"Query on {collection} filtering {filter_fields} (ranges {range_fields}) "
+                       f"sorted by {sort_fields} has no supporting index")
+    return index_report
+
+@api_router.get("/indexes")
+async def get_index_report():
+    """Get declared indexes, what the last startup built, and query shapes left unindexed"""
     return {
-        "year": year,
-        "month": month,
-        "events": [CulturalEvent(**event) for event in events]
+        "collections": index_report,
+        "unindexed_query_shapes": [
+            {"collection": c, "filter": f, "sort": o, "range": r} for c, f, o, r in unindexed_query_shapes()
+        ]
     }
 
 # Include the router in the main app
 app.include_router(api_router)
 
+try:
+    from brotli_asgi import BrotliMiddleware as CompressionMiddleware  # negotiates br, falls back to gzip
+except ImportError:
+    CompressionMiddleware = GZipMiddleware
+
+class SelectiveCompressionMiddleware:
+    """Compress responses except Server-Sent Event streams, which must reach the client frame by frame"""
+
+    def __init__(self, app, minimum_size: int = 1000, exclude_paths=("/api/chat/stream",)):
+        self.app = app
+        self.compressed_app = CompressionMiddleware(app, minimum_size=minimum_size)
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not scope["path"].startswith(self.exclude_paths):
+            await self.compressed_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+app.add_middleware(SelectiveCompressionMiddleware, minimum_size=1000)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Idempotent-Replayed"],
 )
 
 # Configure logging
@@ -1030,6 +3357,77 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_indexes():
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to ensure database indexes: {e}")
+
+@app.on_event("startup")
+async def startup_monastery_facts():
+    # Re-derive typed attributes so documents stored before they existed, or
+    # parsed by an older version of the parsers, are brought up to date
+    try:
+        monasteries = await db.sikkim_monasteries.find({}, model_projection(SikkimMonastery)).to_list(length=None)
+        stale = []
+        for m in monasteries:
+            facts = monastery_facts(m)
+            if any(m.get(field) != value for field, value in facts.items()):
+                stale.append(UpdateOne({"id": m['id']}, {"$set": {**facts, "updated_at": datetime.now(timezone.utc)}}))
+        if stale:
+            await db.sikkim_monasteries.bulk_write(stale)
+            await publish_catalog_write()
+            logger.info(f"Parsed typed attributes for {len(stale)} monasteries")
+    except Exception as e:
+        logger.error(f"Failed to parse typed monastery attributes: {e}")
+
+@app.on_event("startup")
+async def startup_data_version_watcher():
+    global data_version_watcher
+    try:
+        # Recorded before the retrieval index is built so no later write is missed
+        await record_data_versions()
+    except Exception as e:
+        logger.error(f"Failed to read data versions: {e}")
+    data_version_watcher = asyncio.create_task(watch_data_versions())
+
+@app.on_event("startup")
+async def startup_retrieval_index():
+    try:
+        await rebuild_retrieval_index()
+        logger.info(f"Built AI guide retrieval index: {retrieval_index.stats()}")
+    except Exception as e:
+        logger.error(f"Failed to build AI guide retrieval index: {e}")
+
+@app.on_event("startup")
+async def startup_openai_client():
+    global openai_client
+    if not OPENAI_API_KEY:
+        logger.warning("OPENAI_API_KEY not set, AI guide disabled")
+        return
+    openai_client = openai.AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE
+            )
+        )
+    )
+
+@app.on_event("shutdown")
+async def shutdown_data_version_watcher():
+    if data_version_watcher is not None:
+        data_version_watcher.cancel()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def shutdown_openai_client():
+    if openai_client is not None:
+        await openai_client.close()
\ No newline at end of file
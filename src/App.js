@@ -15,6 +15,46 @@ import Panoramic360Viewer from './components/Panoramic360Viewer';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || 'https://api.placeholder.com';
 const API = `${BACKEND_URL}/api`;
 
+// Stream an AI guide reply over Server-Sent Events, calling onDelta with the text received so far
+const streamChat = async (payload, onDelta) => {
+  const response = await fetch(`${API}/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(payload)
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Chat stream failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let text = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const frames = buffer.split('\n\n');
+    buffer = frames.pop();
+    for (const frame of frames) {
+      let event = 'message';
+      let data = '';
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (!data) continue;
+      const parsed = JSON.parse(data);
+      if (event === 'error') throw new Error(parsed.detail);
+      if (event === 'message' && parsed.delta) {
+        text += parsed.delta;
+        onDelta(text);
+      }
+    }
+  }
+  return text;
+};
+
 // Mock data for when backend is not available
 const MOCK_MONASTERIES = [
   {
@@ -831,17 +871,20 @@ const MonasteryDetails = ({ monastery, onClose, onStartTour }) => {
     setChatMessages(prev => [...prev, { type: 'user', message: userMessage, timestamp: new Date() }]);
     
     try {
-      const response = await axios.post(`${API}/chat`, {
+      const startedAt = new Date();
+      await streamChat({
         message: userMessage,
         session_id: sessionId,
         monastery_id: monastery.id
+      }, (text) => {
+        setChatMessages(prev => {
+          const last = prev[prev.length - 1];
+          if (last && last.type === 'ai' && last.timestamp === startedAt) {
+            return [...prev.slice(0, -1), { ...last, message: text }];
+          }
+          return [...prev, { type: 'ai', message: text, timestamp: startedAt }];
+        });
       });
-      
-      setChatMessages(prev => [...prev, { 
-        type: 'ai', 
-        message: response.data.response,
-        timestamp: new Date()
-      }]);
     } catch (error) {
       console.error('Chat error:', error);
       // Enhanced AI responses with better keyword matching
@@ -1318,17 +1361,20 @@ const GlobalAIChat = ({ onClose }) => {
     setChatMessages(prev => [...prev, { type: 'user', message: userMessage, timestamp: new Date() }]);
     
     try {
-      const response = await axios.post(`${API}/chat`, {
+      const startedAt = new Date();
+      await streamChat({
         message: userMessage,
         session_id: sessionId,
         monastery_id: null // No specific monastery context
+      }, (text) => {
+        setChatMessages(prev => {
+          const last = prev[prev.length - 1];
+          if (last && last.type === 'ai' && last.timestamp === startedAt) {
+            return [...prev.slice(0, -1), { ...last, message: text }];
+          }
+          return [...prev, { type: 'ai', message: text, timestamp: startedAt }];
+        });
       });
-      
-      setChatMessages(prev => [...prev, { 
-        type: 'ai', 
-        message: response.data.response,
-        timestamp: new Date()
-      }]);
     } catch (error) {
       console.error('Chat error:', error);
       // Provide intelligent mock responses for general queries
@@ -1965,19 +2011,13 @@ const Home = () => {
   useEffect(() => {
     const initializeData = async () => {
       try {
-        // Try to fetch from backend first
-        const monasteryResponse = await axios.get(`${API}/monasteries`);
-        setMonasteries(monasteryResponse.data);
-        setFilteredMonasteries(monasteryResponse.data);
-        
-        // Fetch filter options
-        const [districtsResponse, traditionsResponse] = await Promise.all([
-          axios.get(`${API}/districts`),
-          axios.get(`${API}/traditions`)
-        ]);
-        
-        setDistricts(districtsResponse.data.districts);
-        setTraditions(traditionsResponse.data.traditions);
+        // Try to fetch from backend first: monasteries and filter options in one request
+        const response = await axios.get(`${API}/bootstrap`, { params: { view: 'full', events_limit: 0 } });
+        const { monasteries: monasteryData, facets } = response.data;
+        setMonasteries(monasteryData);
+        setFilteredMonasteries(monasteryData);
+        setDistricts(facets.districts.map(facet => facet.value));
+        setTraditions(facets.traditions.map(facet => facet.value));
       } catch (error) {
         console.log('Backend not available, using mock data');
         // Use mock data when backend is not available